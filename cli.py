@@ -0,0 +1,173 @@
+"""
+Single command-line entry point for the project tools
+
+    python cli.py fill [--dry-run] [--csv PATH] [--batch-size N] [--export PATH]
+    python cli.py verify [--accuracy] [--csv PATH]
+    python cli.py monitor [--once] [--interval SECONDS]
+    python cli.py find-active [--csv PATH]
+    python cli.py backtest [--csv PATH] [--limit N] [--reference TICKER] [--processes N]
+    python cli.py update [--export PATH]
+    python cli.py daemon [--port PORT] [--max-mb MB]
+
+Only argparse is imported up front; pandas, yfinance and the tool modules are
+imported inside the subcommand that needs them, so --help and argument errors
+are instant.
+"""
+import argparse
+import sys
+
+from strategy_columns import BENCHMARK_TICKER, DATASET_CSV
+
+
+def run_fill(args):
+    import fill_missing_returns_IMPROVED as fill
+
+    if not args.dry_run:
+        fill.main(csv_path=args.csv, batch_size=args.batch_size, results_dir=args.results_dir,
+                  export_path=args.export, cache_mb=args.cache_mb, cache_dir=args.cache_dir)
+        return
+
+    from price_daemon import get_daemon_client
+    from strategy_columns import column_mapping
+
+    df = fill.load_dataset(args.csv, columns=['date', 'ticker'] + list(column_mapping.values()))
+    plan = fill.plan_fill(
+        df,
+        batch_size=args.batch_size,
+        cache_dir=args.cache_dir,
+        seconds_per_fetch=args.seconds_per_fetch or fill.SECONDS_PER_FETCH,
+        max_calls_per_hour=args.max_calls_per_hour,
+        results_dir=args.results_dir,
+    )
+    fill.print_plan(plan, daemon_available=get_daemon_client() is not None)
+
+
+def run_verify(args):
+    if args.accuracy:
+        from verify_data_accuracy import verify_iyw_data, verify_msft_data
+
+        verify_msft_data(args.csv)
+        verify_iyw_data(args.csv)
+    else:
+        from verify_data_simple import check_yahoo_finance_connection, verify_data_simple
+
+        verify_data_simple(args.csv)
+        check_yahoo_finance_connection()
+
+
+def run_monitor(args):
+    from monitor_progress import check_progress, monitor_production_run
+
+    if args.once:
+        check_progress(args.results_dir)
+    else:
+        monitor_production_run(interval=args.interval, results_dir=args.results_dir)
+
+
+def run_find_active(args):
+    from find_active_stocks import main
+
+    main(csv_path=args.csv)
+
+
+def run_backtest(args):
+    from vectorized_backtest import backtest_from_csv
+
+    backtest_from_csv(
+        args.csv,
+        cache_dir=args.cache_dir,
+        reference_ticker=args.reference,
+        limit=args.limit,
+        start_cash=args.start_cash,
+        export=not args.no_export,
+        processes=args.processes,
+        window_days=args.window_days,
+    )
+
+
+def run_update(args):
+    from maturity import daily_update
+    from price_store import DEFAULT_CACHE_DIR, PriceStore
+
+    store = PriceStore(cache_dir=args.cache_dir or DEFAULT_CACHE_DIR)
+    daily_update(args.results_dir, store, csv_path=args.csv, export_path=args.export)
+
+
+def run_daemon(args):
+    from price_daemon import serve
+
+    serve(args.host, args.port, args.cache_dir, args.max_mb)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Ted event study tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fill = subparsers.add_parser('fill', help="Fill missing strategy returns in the events CSV")
+    fill.add_argument('--csv', default=DATASET_CSV, help="Events CSV")
+    fill.add_argument('--batch-size', type=int, default=300)
+    fill.add_argument('--results-dir', default='fill_results', help="Memory-mapped result matrix directory")
+    fill.add_argument('--export', default='filled_returns_IMPROVED.csv',
+                      help="Final results file (.csv or .parquet)")
+    fill.add_argument('--dry-run', action='store_true',
+                      help="Report missing cells, tickers/dates to fetch, API calls and wall time, then exit")
+    fill.add_argument('--cache-dir', default=None, help="Price store directory (default price_store)")
+    fill.add_argument('--cache-mb', type=int, default=64, help="In-process price cache limit in MB")
+    fill.add_argument('--seconds-per-fetch', type=float, default=None,
+                      help="--dry-run: assumed time per full-history fetch by the price daemon (default 1.5)")
+    fill.add_argument('--max-calls-per-hour', type=int, default=None,
+                      help="--dry-run: API rate limit to plan against")
+    fill.set_defaults(func=run_fill)
+
+    verify = subparsers.add_parser('verify', help="Check filled results against Yahoo Finance")
+    verify.add_argument('--accuracy', action='store_true',
+                        help="Recompute MSFT/IYW returns from Yahoo instead of the quick summary")
+    verify.add_argument('--csv', default='filled_returns_IMPROVED.csv', help="Exported fill results to check")
+    verify.set_defaults(func=run_verify)
+
+    monitor = subparsers.add_parser('monitor', help="Watch fill progress from the result matrix")
+    monitor.add_argument('--once', action='store_true', help="Print one progress report and exit")
+    monitor.add_argument('--interval', type=int, default=300, help="Seconds between reports")
+    monitor.add_argument('--results-dir', default='fill_results', help="Result matrix of the running fill")
+    monitor.set_defaults(func=run_monitor)
+
+    find_active = subparsers.add_parser('find-active', help="List recently active tickers in the dataset")
+    find_active.add_argument('--csv', default=DATASET_CSV, help="Events CSV")
+    find_active.set_defaults(func=run_find_active)
+
+    backtest = subparsers.add_parser('backtest', help="Run the vectorized Ted event study backtest")
+    backtest.add_argument('--csv', default=DATASET_CSV, help="Events CSV (permno, date, ticker)")
+    backtest.add_argument('--limit', type=int, default=None, help="Only use the first N events")
+    backtest.add_argument('--reference', default=BENCHMARK_TICKER, help="Reference feed ticker")
+    backtest.add_argument('--cache-dir', default=None, help="Price store directory")
+    backtest.add_argument('--start-cash', type=float, default=1000000)
+    backtest.add_argument('--no-export', action='store_true', help="Skip the results CSV")
+    backtest.add_argument('--processes', type=int, default=1, help="Worker processes for building trades")
+    backtest.add_argument('--window-days', type=int, default=None,
+                          help="Event-date window per worker task (default: span / processes)")
+    backtest.set_defaults(func=run_backtest)
+
+    update = subparsers.add_parser('update', help="Daily update: append the newest prices, fill matured cells")
+    update.add_argument('--results-dir', default='fill_results', help="Result matrix of the fill run")
+    update.add_argument('--cache-dir', default=None, help="Price store directory")
+    update.add_argument('--csv', default=DATASET_CSV, help="Events CSV (only read to build the queue or export)")
+    update.add_argument('--export', default=None, help="Also re-export the results (.csv or .parquet)")
+    update.set_defaults(func=run_update)
+
+    daemon = subparsers.add_parser('daemon', help="Run the local pricing daemon")
+    daemon.add_argument('--host', default='127.0.0.1')
+    daemon.add_argument('--port', type=int, default=8765)
+    daemon.add_argument('--cache-dir', default=None, help="On-disk price cache directory")
+    daemon.add_argument('--max-mb', type=int, default=512, help="In-memory cache limit in MB")
+    daemon.set_defaults(func=run_daemon)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Ingest-time data-quality flags, stored as a bitmask next to each ticker's price arrays"""
+import numpy as np
+
+# Quality flags (one uint8 per trading day)
+BAD_OPEN = 1      # Open missing, zero or negative
+BAD_CLOSE = 2     # Close missing, zero or negative
+SPLIT_JUMP = 4    # Close moved by a split-like ratio and stayed there (informational - data is
+                  # split-adjusted, so this is a real crash or doubling)
+STALE = 8         # Close repeated from the previous day inside a long unchanged run
+GAP = 16          # Unusually long calendar gap since the previous row (informational)
+SPIKE = 32        # One-day split-like jump that reverts the next day (bad print)
+
+FLAG_NAMES = {
+    BAD_OPEN: 'bad_open',
+    BAD_CLOSE: 'bad_close',
+    SPLIT_JUMP: 'split_jumps',
+    STALE: 'stale_days',
+    GAP: 'gaps',
+    SPIKE: 'spikes',
+}
+
+# Points with these flags are skipped by price lookups (plus BAD_OPEN / BAD_CLOSE for that field)
+DEFAULT_SKIP_FLAGS = SPIKE | STALE
+
+QUALITY_VERSION = 2  # Bump when the flags change: stored masks of older versions are recomputed
+
+SPLIT_JUMP_RATIO = 1.9    # 2:1 splits and larger (and reverse splits) in adjusted data
+STALE_RUN_DAYS = 5        # Identical closes for this many rows in a row
+MAX_GAP_DAYS = 10         # Weekends + holidays never exceed this
+
+
+def compute_quality_mask(dates, open_prices, close_prices, split_jump_ratio=SPLIT_JUMP_RATIO,
+                         stale_run_days=STALE_RUN_DAYS, max_gap_days=MAX_GAP_DAYS):
+    """Vectorized quality pass over one ticker's sorted daily prices"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    open_prices = np.asarray(open_prices, dtype=np.float64)
+    close_prices = np.asarray(close_prices, dtype=np.float64)
+
+    mask = np.zeros(len(dates), dtype=np.uint8)
+    if len(dates) == 0:
+        return mask
+
+    bad_open = ~(np.isfinite(open_prices) & (open_prices > 0))
+    bad_close = ~(np.isfinite(close_prices) & (close_prices > 0))
+    mask[bad_open] |= BAD_OPEN
+    mask[bad_close] |= BAD_CLOSE
+
+    # Split-like jumps between consecutive valid closes
+    valid_idx = np.nonzero(~bad_close)[0]
+    if len(valid_idx) > 1:
+        ratio = close_prices[valid_idx[1:]] / close_prices[valid_idx[:-1]]
+        up = ratio >= split_jump_ratio
+        down = ratio <= 1 / split_jump_ratio
+        # A one-day spike is followed by a jump back to normal - only the spike is bad
+        correction = np.zeros(len(ratio), dtype=bool)
+        correction[1:] = (up[1:] & down[:-1]) | (down[1:] & up[:-1])
+        spike = np.zeros(len(ratio), dtype=bool)
+        spike[:-1] = correction[1:]
+        mask[valid_idx[1:][spike]] |= SPIKE
+        mask[valid_idx[1:][(up | down) & ~spike & ~correction]] |= SPLIT_JUMP
+
+    # Stale runs: the repeated rows of a run of identical closes
+    repeated = np.zeros(len(dates), dtype=bool)
+    repeated[1:] = (close_prices[1:] == close_prices[:-1]) & ~bad_close[1:]
+    run_id = np.cumsum(~repeated)
+    run_length = np.bincount(run_id)[run_id]
+    mask[repeated & (run_length >= stale_run_days)] |= STALE
+
+    # Calendar gaps
+    gaps = np.zeros(len(dates), dtype=bool)
+    gaps[1:] = (dates[1:] - dates[:-1]).astype(np.int64) > max_gap_days
+    mask[gaps] |= GAP
+
+    return mask
+
+
+def skip_mask(price_type, skip_flags=DEFAULT_SKIP_FLAGS):
+    """Flags that make a point unusable for an 'open' or 'close' lookup"""
+    return (BAD_OPEN if price_type == 'open' else BAD_CLOSE) | skip_flags
+
+
+def quality_report(dates, mask, skip_flags=DEFAULT_SKIP_FLAGS, max_bad_fraction=0.1):
+    """Per-ticker counts from a stored mask (no re-validation of the prices)"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    mask = np.asarray(mask, dtype=np.uint8)
+
+    report = {'total_days': len(mask)}
+    report['date_range'] = f"{dates[0]} to {dates[-1]}" if len(dates) else "no data"
+    for flag, name in FLAG_NAMES.items():
+        report[name] = int(np.count_nonzero(mask & flag))
+
+    unusable = int(np.count_nonzero(mask & (BAD_OPEN | BAD_CLOSE | skip_flags)))
+    report['unusable_days'] = unusable
+    report['valid'] = len(mask) > 0 and unusable <= len(mask) * max_bad_fraction
+    return report
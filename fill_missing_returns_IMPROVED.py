@@ -1,231 +1,258 @@
+import os
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
-import time
-
-# Load the dataset
-print("📊 Loading dataset...")
-df = pd.read_csv("Testing Data for Upwork -- with Tickers -- R.csv")
-print(f"✅ Loaded {len(df):,} events")
-
-# Define the strategies and column mappings
-strategies = []
-buy_delays = [1, 7, 14, 28]
-sell_delays = [30, 60]
-assets = ['Stock', 'IYW']
-
-for buy_delay in buy_delays:
-    for sell_delay in sell_delays:
-        for asset in assets:
-            strategies.append((buy_delay, sell_delay, asset))
-
-# Create column mapping based on actual CSV structure
-column_mapping = {}
-for buy_delay in buy_delays:
-    for sell_delay in sell_delays:
-        # Stock columns - only B1S30 has "Return" prefix
-        if buy_delay == 1 and sell_delay == 30:
-            stock_col = f"Return B1S{sell_delay}"
-        elif buy_delay == 1:
-            stock_col = f"B1S{sell_delay}"
-        else:
-            stock_col = f"B{buy_delay}S{sell_delay}"
-        column_mapping[(buy_delay, sell_delay, 'Stock')] = stock_col
-        
-        # IYW columns - only B1S30 has "IYW" prefix
-        if buy_delay == 1 and sell_delay == 30:
-            iyw_col = f"IYW B1S{sell_delay}"
-        elif buy_delay == 1:
-            iyw_col = f"B1S{sell_delay}.1"
-        else:
-            iyw_col = f"B{buy_delay}S{sell_delay}.1"
-        column_mapping[(buy_delay, sell_delay, 'IYW')] = iyw_col
+
+from price_daemon import get_daemon_client
+from price_store import DEFAULT_CACHE_DIR, PriceStore, disk_path, trading_days_after
+# Strategies and column mappings are shared with the other tools
+from strategy_columns import BENCHMARK_TICKER, DATASET_CSV, strategies, column_mapping
+from result_matrix import DEFAULT_RESULTS_DIR, FILLED_CSV, ResultMatrix
+
+# Result matrix column j holds strategies[j]
+result_columns = [column_mapping[strategy] for strategy in strategies]
+
+BATCH_SIZE = 300  # Standard batch size
+
+# Planner assumption (override from the command line once measured on the target machine)
+SECONDS_PER_FETCH = 1.5    # One full-history fetch by the price store
+
+def load_dataset(csv_path=DATASET_CSV, columns=None):
+    """Load the events CSV (done in main, not at import, so tools start instantly)"""
+    print("📊 Loading dataset...")
+    df = pd.read_csv(csv_path, usecols=columns)
+    print(f"✅ Loaded {len(df):,} events")
+    return df
 
 def convert_date_format(date_int):
     """Convert YYYYMMDD to datetime"""
     return datetime.strptime(str(date_int), "%Y%m%d")
 
-# Cache for price data
-price_cache = {}
+# Bounded in-process price cache (LRU by bytes, hit/miss/eviction counters), created in
+# main() when no daemon is running. It shares the daemon's on-disk cache directory.
+PRICE_CACHE_MB = 64
+price_store = None
 
-def get_price_on_date_with_retry(date, ticker, max_retries=3):
-    """Get price for ticker on specific date with retry logic"""
-    for attempt in range(max_retries):
-        try:
-            # Create date range (get a few days to ensure we have data)
-            start_date = date - timedelta(days=5)
-            end_date = date + timedelta(days=5)
-            
-            # Create cache key
-            cache_key = f"{ticker}_{start_date.strftime('%Y-%m-%d')}_{end_date.strftime('%Y-%m-%d')}"
-            
-            # Check cache first
-            if cache_key not in price_cache:
-                # Add small delay to avoid rate limiting
-                if attempt > 0:
-                    time.sleep(1)
-                    
-                data = yf.download(ticker, start=start_date, end=end_date, progress=False)
-                
-                if data.empty:
-                    return None
-                    
-                price_cache[cache_key] = data
-            
-            data = price_cache[cache_key]
-            
-            # Find the exact date or the closest available date
-            target_date = pd.Timestamp(date.date())
-            
-            if target_date in data.index:
-                # Access multi-level columns correctly: ('Close', 'TICKER')
-                close_cols = [col for col in data.columns if 'Close' in str(col)]
-                if close_cols:
-                    price = data.loc[target_date, close_cols[0]]
-                    return float(price)
-                else:
-                    return None
-            else:
-                # Find closest date
-                available_dates = data.index
-                if len(available_dates) > 0:
-                    closest_date = min(available_dates, key=lambda x: abs(x - target_date))
-                    
-                    close_cols = [col for col in data.columns if 'Close' in str(col)]
-                    if close_cols:
-                        price = data.loc[closest_date, close_cols[0]]
-                        return float(price)
-                
-                return None
-                    
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"⚠️  Retry {attempt + 1} for {ticker}: {str(e)[:50]}...")
-                time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-            else:
-                # Final attempt failed
-                return None
-                
-    return None
-
-def calculate_return_with_retry(event_date, ticker, buy_delay, sell_delay):
-    """Calculate return for a specific strategy with retry logic"""
+# Local price daemon client, connected in main() when one is running (python price_daemon.py)
+price_daemon = None
+
+def get_price_store(cache_mb=PRICE_CACHE_MB, cache_dir=None):
+    """The in-process bounded price cache (created on first use)"""
+    global price_store
+    if price_store is None:
+        price_store = PriceStore(cache_dir=cache_dir or DEFAULT_CACHE_DIR, max_bytes=cache_mb * 1024 * 1024)
+    return price_store
+
+def print_cache_stats():
+    """Hit/miss/eviction counters of whichever price cache is in use"""
     try:
-        # Calculate buy and sell dates
-        buy_date = event_date + timedelta(days=buy_delay)
-        sell_date = event_date + timedelta(days=sell_delay)
-        
-        # Skip weekends (basic check - could be improved with trading calendar)
-        while buy_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
-            buy_date += timedelta(days=1)
-        while sell_date.weekday() >= 5:
-            sell_date += timedelta(days=1)
-        
-        # Get prices
-        buy_price = get_price_on_date_with_retry(buy_date, ticker)
-        if buy_price is None:
-            return None
-            
-        sell_price = get_price_on_date_with_retry(sell_date, ticker)
-        if sell_price is None:
-            return None
-        
-        # Calculate return
-        return_value = (sell_price - buy_price) / buy_price
-        return return_value
-        
+        stats = price_daemon.stats() if price_daemon is not None else get_price_store().get_stats()
     except Exception as e:
-        return None
+        print(f"⚠️  Could not read price cache stats: {str(e)[:50]}...")
+        return
+    print(f"📦 Price cache: {stats['hit_rate']*100:.1f}% hit rate | Hits: {stats['hits']:,} | "
+          f"Misses: {stats['misses']:,} | Evictions: {stats['evictions']:,} | Fetches: {stats['fetches']:,} | "
+          f"{stats['bytes']/1024/1024:.1f}/{stats['max_bytes']/1024/1024:.0f} MB")
 
-def process_batch_improved(batch_df, batch_num, total_batches):
-    """Process a batch of events with improved error handling"""
-    print(f"\n🚀 Processing batch {batch_num}/{total_batches} ({len(batch_df)} events)")
-    
-    # Create a copy of the batch to modify
-    result_batch = batch_df.copy()
-    filled_count = 0
-    total_to_fill = 0
-    failed_count = 0
-    output_file = f"batch_result_IMPROVED_{batch_num:04d}.csv"
-
-    for batch_idx, (idx, row) in enumerate(batch_df.iterrows()):
-        event_date = convert_date_format(row['date'])
-        stock_ticker = row['ticker']
-        
-        if batch_idx == 0 or batch_idx % 50 == 0:  # Show progress every 50 events
-            print(f"📊 Processing event {batch_idx+1}/{len(batch_df)}: {stock_ticker} on {event_date.strftime('%Y-%m-%d')}")
-        
-        # Process all strategies for this row
-        row_filled = 0
-        row_total = 0
-        
-        for strategy in strategies:
-            buy_delay, sell_delay, asset = strategy
-            column_name = column_mapping[strategy]
-            
-            if pd.isna(row[column_name]):
-                row_total += 1
-                total_to_fill += 1
-                ticker = stock_ticker if asset == 'Stock' else 'IYW'
-                return_value = calculate_return_with_retry(event_date, ticker, buy_delay, sell_delay)
-                
-                if return_value is not None:
-                    result_batch.at[idx, column_name] = return_value
-                    filled_count += 1
-                    row_filled += 1
-                else:
-                    failed_count += 1
-        
-        # Show row summary for first few events
-        if batch_idx < 5:
-            print(f"  📈 Row {batch_idx+1} summary: {row_filled}/{row_total} columns filled")
-        
-        # Save after every 100 events for progress tracking
-        if (batch_idx + 1) % 100 == 0:
-            result_batch.to_csv(output_file, index=False)
-            print(f"  💾 Progress saved after {batch_idx+1} events")
+def process_batch_improved(batch_df, batch_num, total_batches, results):
+    """
+    Process a batch of events with improved error handling
+
+    One batched query (price daemon, else the in-process price cache) prices every
+    strategy for every event; pending cells are stored in place in the memory-mapped
+    ResultMatrix (row = dataset row, column = strategy index) with their status.
+    """
+    first = batch_df.iloc[0]
+    print(f"\n🚀 Processing batch {batch_num}/{total_batches} ({len(batch_df)} events, "
+          f"from {first['ticker']} on {first['date']})")
     
-    # Final save
-    result_batch.to_csv(output_file, index=False)
+    rows = batch_df.index.to_numpy()
+    events = [(convert_date_format(d), t) for d, t in zip(batch_df['date'], batch_df['ticker'])]
+
+    batch_returns = None
+    if price_daemon is not None:
+        try:
+            batch_returns, batch_status = price_daemon.returns(events, strategies, with_status=True)
+        except Exception as e:
+            print(f"⚠️  Price daemon query failed, falling back to the local price cache: {str(e)[:50]}...")
+    if batch_returns is None:
+        batch_returns, batch_status = get_price_store().returns(events, strategies, with_status=True)
+
+    # Only cells still pending are written - values from the dataset or earlier runs are kept
+    pending_rows, pending_cols = np.nonzero(results.pending(rows))
+    values = batch_returns[pending_rows, pending_cols]
+    results.set_many(rows[pending_rows], pending_cols, values, batch_status[pending_rows, pending_cols])
+    results.flush()
+
+    total_to_fill = len(values)
+    filled_count = int(np.count_nonzero(~np.isnan(values)))
+    failed_count = total_to_fill - filled_count
     fill_rate = (filled_count / total_to_fill * 100) if total_to_fill > 0 else 0
     print(f"📈 Batch {batch_num} COMPLETE: {fill_rate:.1f}% fill rate ({filled_count}/{total_to_fill})")
     print(f"❌ Failed attempts: {failed_count}")
-    print(f"💾 Final results saved to {output_file}")
-    return result_batch
+    return filled_count, total_to_fill
+
+def plan_fill(df, batch_size=BATCH_SIZE, cache_dir=None, seconds_per_fetch=SECONDS_PER_FETCH,
+              max_calls_per_hour=None, results_dir=DEFAULT_RESULTS_DIR):
+    """
+    Dry-run planner: size a fill run without downloading anything
+
+    Counts the missing cells per column, the (ticker, price date) pairs they need,
+    and the API calls left after caching and dedup: events run in ticker order, so
+    each ticker not already in the disk cache is fetched once (full history),
+    whether the daemon or the in-process price cache does the fetching.
+    When a result matrix from an earlier run exists, only its pending cells are counted.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    event_days = pd.to_datetime(df['date'].astype(str), format='%Y%m%d', errors='coerce').to_numpy().astype('datetime64[D]')
+    tickers = df['ticker'].astype(str).str.strip().str.upper().to_numpy(dtype=object)
+    valid_dates = ~np.isnat(event_days)
+
+    missing_cells = df[result_columns].isna().to_numpy()
+    resumed = results_dir is not None and ResultMatrix.exists(results_dir)
+    if resumed:
+        missing_cells = ResultMatrix(results_dir, mode='r').pending()
+
+    missing_by_column = {}
+    pair_tickers = []
+    pair_days = []
+    for strategy_idx, strategy in enumerate(strategies):
+        buy_delay, sell_delay, asset = strategy
+        column_name = column_mapping[strategy]
+        missing = missing_cells[:, strategy_idx]
+        missing_by_column[column_name] = int(missing.sum())
+
+        rows = np.nonzero(missing & valid_dates)[0]
+        if len(rows) == 0:
+            continue
+        priced = tickers[rows] if asset == 'Stock' else np.full(len(rows), BENCHMARK_TICKER, dtype=object)
+        for delay in (buy_delay, sell_delay):
+            pair_tickers.append(priced)
+            pair_days.append(trading_days_after(event_days[rows], delay))
+
+    if pair_tickers:
+        pairs = pd.DataFrame({'ticker': np.concatenate(pair_tickers), 'day': np.concatenate(pair_days)})
+        pairs = pairs.drop_duplicates()
+        unique_tickers = pairs['ticker'].unique()
+        unique_dates = pairs['day'].nunique()
+    else:
+        pairs = pd.DataFrame({'ticker': [], 'day': []})
+        unique_tickers = np.array([], dtype=object)
+        unique_dates = 0
+
+    cached_tickers = sum(1 for ticker in unique_tickers if os.path.exists(disk_path(cache_dir, ticker)))
+    api_calls = len(unique_tickers) - cached_tickers
+    wall_seconds = api_calls * seconds_per_fetch
+    if max_calls_per_hour:
+        wall_seconds = max(wall_seconds, api_calls / max_calls_per_hour * 3600)
+    pending_events = int(missing_cells.any(axis=1).sum())
+
+    return {
+        'events': len(df),
+        'pending_events': pending_events,
+        'batches': (pending_events + batch_size - 1) // batch_size,
+        'missing_by_column': missing_by_column,
+        'missing_cells': sum(missing_by_column.values()),
+        'bad_event_dates': int((~valid_dates).sum()),
+        'unique_tickers': len(unique_tickers),
+        'unique_dates': int(unique_dates),
+        'unique_ticker_dates': len(pairs),
+        'cached_tickers': cached_tickers,
+        'api_calls': api_calls,
+        'wall_seconds': wall_seconds,
+        'cache_dir': cache_dir,
+        'resumed_from': results_dir if resumed else None,
+    }
+
+def print_plan(plan, daemon_available=False):
+    """Print a plan_fill() report"""
+    def duration(seconds):
+        return f"{seconds/3600:,.1f} hours" if seconds >= 3600 else f"{seconds/60:,.1f} minutes"
 
-def main():
+    print(f"\n🧭 DRY RUN - nothing will be downloaded or written")
+    print(f"📋 {plan['pending_events']:,} of {plan['events']:,} events to process in {plan['batches']:,} batches")
+    if plan['resumed_from']:
+        print(f"💾 Resuming: counting pending cells in {plan['resumed_from']}/")
+    if plan['bad_event_dates']:
+        print(f"⚠️  Events with unparseable dates (never filled): {plan['bad_event_dates']:,}")
+    print(f"📊 Missing cells per column:")
+    for column_name, missing in plan['missing_by_column'].items():
+        print(f"   {column_name:<12} {missing:>12,}")
+    print(f"   {'TOTAL':<12} {plan['missing_cells']:>12,}")
+    print(f"🎯 To fetch: {plan['unique_tickers']:,} tickers, {plan['unique_dates']:,} dates, "
+          f"{plan['unique_ticker_dates']:,} unique ticker/date pairs")
+    print(f"💾 Tickers already in {plan['cache_dir']}/: {plan['cached_tickers']:,}")
+
+    source = "price daemon" if daemon_available else "in-process price cache (no daemon running)"
+    print(f"\n🌐 Expected API calls after caching/dedup: {plan['api_calls']:,} full-history fetches via {source}")
+    print(f"⏱️  Estimated wall time: ~{duration(plan['wall_seconds'])} (excluding retries)")
+
+def main(csv_path=DATASET_CSV, batch_size=BATCH_SIZE, results_dir=DEFAULT_RESULTS_DIR, export_path=FILLED_CSV,
+         cache_mb=PRICE_CACHE_MB, cache_dir=None):
     """Main processing function"""
+    global price_daemon
+
     print("🎯 Starting PRODUCTION batch processing with validated improved logic...")
     
+    df = load_dataset(csv_path)
+    price_daemon = get_daemon_client()
+    get_price_store(cache_mb, cache_dir)  # Also the fallback if a daemon query fails
+    if price_daemon is not None:
+        print("🚀 Using local price daemon for batched price queries")
+    else:
+        print(f"💾 Using in-process price cache (LRU, {cache_mb:,} MB, {cache_dir or DEFAULT_CACHE_DIR}/)")
+
+    # Results live in a memory-mapped matrix; an interrupted run resumes from it
+    results = ResultMatrix.open_or_create(results_dir, df, result_columns)
+    counts = results.status_counts()
+    print(f"💾 Result matrix {results_dir}/: {counts['pending']:,} cells pending, {counts['filled']:,} filled")
+
+    # Rows with pending cells, grouped by ticker then date: each ticker's history is loaded
+    # once, used for all of its events, then ages out of the LRU (memory stays flat)
+    pending_rows = np.nonzero(results.pending().any(axis=1))[0]
+    order = df.iloc[pending_rows].sort_values(['ticker', 'date'], kind='stable').index.to_numpy()
+
     # Configuration - full production run
-    BATCH_SIZE = 300  # Standard batch size
-    total_events = len(df)
-    total_batches = (total_events + BATCH_SIZE - 1) // BATCH_SIZE
+    total_events = len(order)
+    total_batches = (total_events + batch_size - 1) // batch_size
     
-    print(f"📋 Processing {total_events:,} events in {total_batches} batches of {BATCH_SIZE}")
-    print(f"📊 Columns to fill: {list(column_mapping.values())}")
+    print(f"📋 Processing {total_events:,} events in {total_batches} batches of {batch_size} (ticker order)")
+    print(f"📊 Columns to fill: {result_columns}")
     print(f"✅ Validated: 91%+ fill rate on active stocks, 50% on delisted stocks")
     
     # Process all batches
-    all_results = []
-    
     for batch_num in range(1, total_batches + 1):
-        start_idx = (batch_num - 1) * BATCH_SIZE
-        end_idx = min(start_idx + BATCH_SIZE, total_events)
-        
-        batch_df = df.iloc[start_idx:end_idx].copy()
+        start_idx = (batch_num - 1) * batch_size
+        end_idx = min(start_idx + batch_size, total_events)
         
         # Process this batch
-        result_batch = process_batch_improved(batch_df, batch_num, total_batches)
-        all_results.append(result_batch)
+        process_batch_improved(df.loc[order[start_idx:end_idx]], batch_num, total_batches, results)
         
         # Optional: Save combined results periodically
         if batch_num % 10 == 0:
             print(f"🔄 Checkpoint: Completed {batch_num}/{total_batches} batches")
+            print_cache_stats()
+    
+    counts = results.status_counts()
+    print(f"✅ All batches completed! Cell status: " + ", ".join(f"{name} {count:,}" for name, count in counts.items()))
+    print_cache_stats()
     
-    print(f"✅ All batches completed! Results saved in individual batch files.")
+    # The only full serialization of the results
+    results.export(df, export_path)
+    print(f"💾 Final results exported to {export_path}")
+    
+    # Cells whose sell date is past the data horizon are filled later by the daily update
+    from maturity import MaturityQueue
+    from price_store import FetchError
+    try:
+        benchmark = get_price_store(cache_mb, cache_dir).history(BENCHMARK_TICKER)
+    except FetchError as e:
+        print(f"⚠️  {str(e)[:80]} - 'python cli.py update' builds the maturity queue later")
+        return
+    if len(benchmark):
+        queue = MaturityQueue.build(results, df, benchmark.dates[-1], get_price_store(cache_mb, cache_dir))
+        queue.save()
+        print(f"🗓️  {len(queue):,} cells wait for future prices - run 'python cli.py update' daily to fill them")
 
 if __name__ == "__main__":
     main()
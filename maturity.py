@@ -0,0 +1,226 @@
+"""
+Maturity scheduler: fill recent cells once their sell date has published prices
+
+Cells whose sell date is past the data horizon (the benchmark's last trading
+day) cannot be computed yet. They wait in a queue sorted by the earliest day
+each one can be computed - its sell day. The daily update appends the newest
+prices to the store, pops exactly the cells whose day has arrived, prices
+them and stores them in place in the ResultMatrix.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from price_store import FetchError, PriceStore
+from result_matrix import DEFAULT_RESULTS_DIR, OUT_OF_COVERAGE, PENDING, ResultMatrix
+from strategy_columns import BENCHMARK_TICKER, strategies
+
+QUEUE_FILE = 'maturity_queue.npz'
+
+_SELL_DELAYS = np.array([sell_delay for _, sell_delay, _ in strategies], dtype='timedelta64[D]')
+
+
+def mature_days(event_days, cols):
+    """Earliest day each cell can be computed: its sell day (weekends rolled forward)"""
+    return np.busday_offset(event_days + _SELL_DELAYS[cols], 0, roll='forward')
+
+
+def priced_tickers(tickers, cols):
+    """Ticker whose prices each cell uses: the event's ticker, or the benchmark for IYW columns"""
+    stock_cells = np.array([strategies[col][2] == 'Stock' for col in cols], dtype=bool)
+    return np.where(stock_cells, tickers, BENCHMARK_TICKER)
+
+
+def lagging(store, priced, days):
+    """Cells whose priced ticker's history ends before their day (prices not published yet)"""
+    last_day = {}
+    for ticker in np.unique(priced):
+        try:
+            history = store.history(ticker)
+        except FetchError:
+            last_day[ticker] = None  # Unknown: keep the cells waiting
+            continue
+        last_day[ticker] = history.dates[-1] if len(history) else np.datetime64('NaT')
+    return np.array([last_day[ticker] is None or last_day[ticker] < day for ticker, day in zip(priced, days)],
+                    dtype=bool)
+
+
+class MaturityQueue:
+    """Pending cells (row, col, event day, ticker) sorted by the day they mature"""
+
+    FIELDS = ('row', 'col', 'event_day', 'ticker', 'mature_day')
+
+    def __init__(self, path, row, col, event_day, ticker, mature_day):
+        self.path = path
+        self._assign(row, col, event_day, ticker, mature_day)
+
+    def _assign(self, row, col, event_day, ticker, mature_day):
+        order = np.argsort(mature_day, kind='stable')
+        self.row = np.asarray(row, dtype=np.int64)[order]
+        self.col = np.asarray(col, dtype=np.int16)[order]
+        self.event_day = np.asarray(event_day, dtype='datetime64[D]')[order]
+        self.ticker = np.asarray(ticker, dtype=str)[order]
+        self.mature_day = np.asarray(mature_day, dtype='datetime64[D]')[order]
+
+    def __len__(self):
+        return len(self.row)
+
+    @property
+    def next_day(self):
+        return self.mature_day[0] if len(self) else None
+
+    @classmethod
+    def path_for(cls, results_dir):
+        return os.path.join(results_dir, QUEUE_FILE)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as stored:
+            return cls(path, *(stored[field] for field in cls.FIELDS))
+
+    @classmethod
+    def build(cls, results, df, horizon_day, store):
+        """
+        Queue every pending / out-of-coverage cell that matures after horizon_day
+
+        Out-of-coverage cells that matured already but whose ticker's history ends
+        before their sell day (lagging the benchmark, not delisted) are queued for
+        the next day, like the daily update re-queues them.
+        """
+        import pandas as pd
+
+        waiting = (results.status == PENDING) | (results.status == OUT_OF_COVERAGE)
+        rows, cols = np.nonzero(waiting)
+        event_days = pd.to_datetime(df['date'].to_numpy()[rows].astype(str), format='%Y%m%d',
+                                    errors='coerce').to_numpy().astype('datetime64[D]')
+        tickers = df['ticker'].astype(str).str.strip().str.upper().to_numpy()[rows]
+
+        valid = ~np.isnat(event_days)
+        rows, cols, event_days, tickers = rows[valid], cols[valid], event_days[valid], tickers[valid]
+        days = mature_days(event_days, cols)
+        later = days > horizon_day
+
+        behind = ~later & (results.status[rows, cols] == OUT_OF_COVERAGE)
+        if behind.any():
+            behind[np.nonzero(behind)[0]] = lagging(store, priced_tickers(tickers[behind], cols[behind]),
+                                                    days[behind])
+            days = np.where(behind, horizon_day + np.timedelta64(1, 'D'), days)
+        queued = later | behind
+        return cls(cls.path_for(results.directory), rows[queued], cols[queued], event_days[queued],
+                   tickers[queued], days[queued])
+
+    def save(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **{field: getattr(self, field) for field in self.FIELDS})
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def pop_matured(self, horizon_day):
+        """Remove and return (row, col, event_day, ticker) of cells maturing on or before horizon_day"""
+        count = np.searchsorted(self.mature_day, horizon_day, side='right')
+        popped = tuple(getattr(self, field)[:count] for field in self.FIELDS[:-1])
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field)[count:])
+        return popped
+
+    def push(self, row, col, event_day, ticker, mature_day):
+        """Add cells back (e.g. prices not published yet for that ticker)"""
+        merged = [np.concatenate([getattr(self, field), values])
+                  for field, values in zip(self.FIELDS, (row, col, event_day, ticker, mature_day))]
+        self._assign(*merged)
+
+
+def daily_update(results_dir=DEFAULT_RESULTS_DIR, store=None, csv_path=None, export_path=None):
+    """
+    Append the newest prices and fill exactly the cells that matured
+
+    Only the benchmark and the tickers of matured cells are updated, one small
+    fetch each. Cells whose ticker has not published the sell day yet are
+    re-queued for the next day; once its history lags the benchmark by
+    DELISTED_GAP_DAYS they are marked delisted and leave the queue.
+    """
+    started = time.time()
+    if store is None:
+        store = PriceStore()
+    results = ResultMatrix(results_dir)
+    queue_path = MaturityQueue.path_for(results_dir)
+
+    # Build the queue once, against the horizon the stored statuses were computed with
+    if not os.path.exists(queue_path):
+        from fill_missing_returns_IMPROVED import load_dataset
+        from strategy_columns import DATASET_CSV
+
+        df = load_dataset(csv_path or DATASET_CSV, columns=['date', 'ticker'])
+        benchmark = store.history(BENCHMARK_TICKER)
+        queue = MaturityQueue.build(results, df, benchmark.dates[-1] if len(benchmark) else np.datetime64('NaT'),
+                                    store)
+        print(f"🗓️  Maturity queue built: {len(queue):,} cells waiting for prices")
+    else:
+        queue = MaturityQueue.load(queue_path)
+
+    try:
+        benchmark = store.update(BENCHMARK_TICKER)
+    except FetchError as e:
+        print(f"❌ {str(e)[:80]} - try again later")
+        return None
+    if len(benchmark) == 0:
+        print(f"❌ No prices for {BENCHMARK_TICKER} - cannot advance the data horizon")
+        return None
+    horizon_day = benchmark.dates[-1]
+
+    rows, cols, event_days, tickers = queue.pop_matured(horizon_day)
+    print(f"📅 Data horizon: {horizon_day} | Matured cells: {len(rows):,} | Still waiting: {len(queue):,}")
+
+    # Append today's prices for the tickers that matured (benchmark cells use the benchmark)
+    priced = priced_tickers(tickers, cols)
+    for ticker in np.unique(tickers[priced != BENCHMARK_TICKER]):
+        try:
+            store.update(ticker, through_day=horizon_day)
+        except FetchError as e:
+            print(f"⚠️  {str(e)[:80]} - its cells are retried tomorrow")
+
+    values = np.full(len(rows), np.nan)
+    statuses = np.zeros(len(rows), dtype=np.uint8)
+    for col in np.unique(cols):
+        cells = np.nonzero(cols == col)[0]
+        events = list(zip(event_days[cells], tickers[cells]))
+        col_values, col_status = store.returns(events, [strategies[col]], with_status=True)
+        values[cells] = col_values[:, 0]
+        statuses[cells] = col_status[:, 0]
+
+    results.set_many(rows, cols, values.astype(np.float32), statuses)
+    results.flush()
+
+    # Sell day not published for this ticker yet (and not delisted), or the fetch
+    # failed and the cell is still pending: try again tomorrow
+    retry = statuses == OUT_OF_COVERAGE
+    if retry.any():
+        retry[np.nonzero(retry)[0]] = lagging(store, priced[retry], mature_days(event_days[retry], cols[retry]))
+    retry |= statuses == PENDING
+    if retry.any():
+        queue.push(rows[retry], cols[retry], event_days[retry], tickers[retry],
+                   np.full(retry.sum(), horizon_day + np.timedelta64(1, 'D')))
+    queue.save()
+
+    filled = int(np.count_nonzero(~np.isnan(values)))
+    stats = store.get_stats()
+    print(f"✅ Filled {filled:,}/{len(rows):,} matured cells | Re-queued: {int(retry.sum()):,} | "
+          f"Price updates: {stats['updates']:,} | {time.time() - started:.1f}s")
+    if queue.next_day is not None:
+        print(f"⏭️  Next cells mature on {queue.next_day}")
+
+    if export_path:
+        from fill_missing_returns_IMPROVED import load_dataset
+        from strategy_columns import DATASET_CSV
+
+        results.export(load_dataset(csv_path or DATASET_CSV), export_path)
+        print(f"💾 Results exported to {export_path}")
+
+    return {'horizon_day': horizon_day, 'matured': len(rows), 'filled': filled,
+            'requeued': int(retry.sum()), 'waiting': len(queue)}
@@ -3,13 +3,35 @@ import os
 import glob
 from datetime import datetime
 
-def check_progress():
+from result_matrix import DEFAULT_RESULTS_DIR, ResultMatrix
+
+def check_matrix_progress(results_dir):
+    """Progress from the result matrix status codes (no CSV parsing)"""
+    results = ResultMatrix(results_dir, mode='r')
+    counts = results.status_counts()
+    initial_pending = results.meta['initial_pending']
+    attempted = initial_pending - counts['pending']
+    progress_percent = (attempted / initial_pending * 100) if initial_pending else 100.0
+
+    print(f"🎯 Overall progress: {progress_percent:.2f}% ({attempted:,}/{initial_pending:,} missing cells attempted)")
+    for name, count in counts.items():
+        print(f"   {name:<16} {count:>12,}")
+
+    rows_done = int((~results.pending().any(axis=1)).sum())
+    print(f"📈 Rows with no pending cells: {rows_done:,}/{results.n_rows:,}")
+
+def check_progress(results_dir=DEFAULT_RESULTS_DIR):
     """Check the current progress of the production run"""
     print(f"\n{'='*60}")
     print(f"📊 PRODUCTION PROGRESS UPDATE - {datetime.now().strftime('%H:%M:%S')}")
     print(f"{'='*60}")
     
-    # Check for batch files
+    if ResultMatrix.exists(results_dir):
+        check_matrix_progress(results_dir)
+        print(f"{'='*60}")
+        return
+    
+    # Older runs: check for batch files
     batch_files = glob.glob("batch_result_IMPROVED_*.csv")
     batch_files.sort()
     
@@ -49,21 +71,21 @@ def check_progress():
     
     print(f"{'='*60}")
 
-def monitor_production_run():
-    """Monitor the production run with 5-minute intervals"""
-    print("🔄 STARTING 5-MINUTE PROGRESS MONITORING")
+def monitor_production_run(interval=300, results_dir=DEFAULT_RESULTS_DIR):
+    """Monitor the production run, checking every interval seconds (5 minutes by default)"""
+    print(f"🔄 STARTING {interval / 60:g}-MINUTE PROGRESS MONITORING")
     print("Press Ctrl+C to stop monitoring")
     
     try:
         while True:
-            check_progress()
-            print("💤 Waiting 5 minutes for next update...")
-            time.sleep(300)  # 5 minutes = 300 seconds
+            check_progress(results_dir)
+            print(f"💤 Waiting {interval / 60:g} minutes for next update...")
+            time.sleep(interval)  # 5 minutes = 300 seconds by default
             
     except KeyboardInterrupt:
         print("\n\n🛑 Monitoring stopped by user")
         print("📊 Final progress check:")
-        check_progress()
+        check_progress(results_dir)
 
 if __name__ == "__main__":
     monitor_production_run()
@@ -0,0 +1,183 @@
+import argparse
+import json
+import math
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+def _to_json_list(values):
+    """numpy array -> nested lists with None instead of NaN (valid JSON)"""
+    return [
+        _to_json_list(value) if isinstance(value, (list, np.ndarray)) else
+        (None if value is None or math.isnan(value) else float(value))
+        for value in values
+    ]
+
+
+def _from_json_list(values):
+    """Nested lists with None -> float array with NaN"""
+    return np.array(values, dtype=np.float64) if values else np.array([], dtype=np.float64)
+
+
+def _date_to_json(value):
+    """Dates travel as YYYYMMDD integers or ISO strings"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+class PriceRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: GET /health, GET /stats, POST /prices, POST /returns"""
+
+    store = None  # Set by serve()
+
+    def log_message(self, format, *args):
+        pass  # Keep the daemon console quiet - stats are available on /stats
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json({'status': 'ok'})
+        elif self.path == '/stats':
+            self._send_json(self.store.get_stats())
+        else:
+            self._send_json({'error': f"Unknown path {self.path}"}, status=404)
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+            price_type = request.get('price_type', 'close')
+
+            if self.path == '/prices':
+                prices = self.store.prices(request['ticker'], request['dates'], price_type)
+                self._send_json({'prices': _to_json_list(prices)})
+            elif self.path == '/returns':
+                events = [tuple(event) for event in request['events']]
+                strategies = [tuple(strategy) for strategy in request['strategies']]
+                if request.get('with_status'):
+                    returns, status = self.store.returns(events, strategies, price_type, with_status=True)
+                    self._send_json({'returns': _to_json_list(returns), 'status': status.tolist()})
+                else:
+                    returns = self.store.returns(events, strategies, price_type)
+                    self._send_json({'returns': _to_json_list(returns)})
+            else:
+                self._send_json({'error': f"Unknown path {self.path}"}, status=404)
+
+        except (KeyError, ValueError, TypeError) as e:
+            self._send_json({'error': str(e)}, status=400)
+        except Exception as e:
+            self._send_json({'error': str(e)}, status=500)
+
+
+class PriceDaemonClient:
+    """Client used by short-lived scripts to query a running price daemon"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=600):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def _request(self, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+            return json.loads(response.read())
+
+    def available(self):
+        """True if a daemon is listening on this address"""
+        try:
+            return self._request('/health', timeout=1).get('status') == 'ok'
+        except (urllib.error.URLError, OSError, ValueError):
+            return False
+
+    def stats(self):
+        return self._request('/stats')
+
+    def prices(self, ticker, dates, price_type='close'):
+        """Prices for one ticker on many dates (NaN where unavailable)"""
+        payload = {
+            'ticker': ticker,
+            'dates': [_date_to_json(d) for d in dates],
+            'price_type': price_type
+        }
+        return _from_json_list(self._request('/prices', payload)['prices'])
+
+    def returns(self, events, strategies, price_type='close', with_status=False):
+        """Batched (events x strategies) return matrix (NaN where unavailable), plus status codes if asked"""
+        payload = {
+            'events': [[_date_to_json(event_date), str(ticker)] for event_date, ticker in events],
+            'strategies': [list(strategy) for strategy in strategies],
+            'price_type': price_type,
+            'with_status': with_status
+        }
+        response = self._request('/returns', payload)
+        returns = _from_json_list(response['returns'])
+        if with_status:
+            return returns, np.array(response['status'], dtype=np.uint8).reshape(returns.shape)
+        return returns
+
+
+def get_daemon_client(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Return a client if a daemon is running, else None"""
+    client = PriceDaemonClient(host, port)
+    return client if client.available() else None
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_dir=None, max_mb=512):
+    """Run the pricing daemon until interrupted"""
+    from price_store import DEFAULT_CACHE_DIR, PriceStore
+
+    store = PriceStore(cache_dir=cache_dir or DEFAULT_CACHE_DIR, max_bytes=max_mb * 1024 * 1024)
+    PriceRequestHandler.store = store
+    server = ThreadingHTTPServer((host, port), PriceRequestHandler)
+
+    print(f"🚀 Price daemon listening on http://{host}:{port}")
+    print(f"💾 Disk cache: {store.cache_dir} | Memory limit: {max_mb:,} MB")
+    print("Press Ctrl+C to stop")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Price daemon stopped by user")
+        stats = store.get_stats()
+        print(f"📊 Hits: {stats['hits']:,} | Misses: {stats['misses']:,} | "
+              f"Evictions: {stats['evictions']:,} | Fetches: {stats['fetches']:,}")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local pricing daemon with a warm price cache")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-dir', default=None, help="On-disk price cache directory")
+    parser.add_argument('--max-mb', type=int, default=512, help="In-memory cache limit in MB")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.cache_dir, args.max_mb)
+
+
+if __name__ == "__main__":
+    main()
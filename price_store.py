@@ -0,0 +1,465 @@
+import os
+import tempfile
+import time
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+
+from data_quality import DEFAULT_SKIP_FLAGS, QUALITY_VERSION, compute_quality_mask, skip_mask
+from result_matrix import FILLED, NO_DATA, PENDING, classify_missing
+from strategy_columns import BENCHMARK_TICKER
+
+DEFAULT_START_DATE = '1998-01-01'
+DEFAULT_CACHE_DIR = 'price_store'
+LOOKUP_WINDOW_DAYS = 5  # Same +/- 5 day search as the fill script and notebook
+UPDATE_OVERLAP_DAYS = 10    # Calendar days of stored prices re-fetched by update() to detect re-basing
+RESTATEMENT_TOLERANCE = 1e-4  # Relative close difference on the overlap that means the history was re-based
+EMPTY_HISTORY_TTL = 15 * 60  # Seconds an empty history stays in memory before it is fetched again
+
+
+def to_day(value):
+    """Convert YYYYMMDD int/str, ISO string, date or datetime to numpy datetime64[D]"""
+    if isinstance(value, (int, np.integer)):
+        value = str(int(value))
+    if isinstance(value, str) and len(value) == 8 and value.isdigit():
+        return np.datetime64(f"{value[:4]}-{value[4:6]}-{value[6:]}", 'D')
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, (str, date, np.datetime64)):
+        return np.datetime64(value, 'D')
+    raise ValueError(f"Unsupported date value: {value!r}")
+
+
+def to_days(values):
+    """Vectorized to_day for a list of dates"""
+    return np.array([to_day(value) for value in values], dtype='datetime64[D]')
+
+
+def trading_days_after(event_days, delay_days):
+    """Add calendar delay and roll weekends forward (same rule as the fill script)"""
+    return np.busday_offset(event_days + np.timedelta64(delay_days, 'D'), 0, roll='forward')
+
+
+def disk_path(cache_dir, ticker):
+    """On-disk cache file for a ticker (one .npz per ticker)"""
+    safe_name = ticker.replace('/', '_').replace('\\', '_')
+    return os.path.join(cache_dir, f"{safe_name}.npz")
+
+
+class PriceHistory:
+    """Normalized daily price arrays for one ticker (sorted calendar days) plus quality bitmask"""
+
+    __slots__ = ('ticker', 'dates', 'open', 'close', 'quality', '_usable')
+
+    def __init__(self, ticker, dates, open_prices, close_prices, quality=None):
+        self.ticker = ticker
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.open = np.asarray(open_prices, dtype=np.float64)
+        self.close = np.asarray(close_prices, dtype=np.float64)
+
+        # Quality flags are computed once at ingest (see data_quality.py)
+        if quality is None:
+            quality = compute_quality_mask(self.dates, self.open, self.close)
+        self.quality = np.asarray(quality, dtype=np.uint8)
+        self._usable = {}
+
+    @classmethod
+    def empty(cls, ticker):
+        return cls(ticker, [], [], [])
+
+    @classmethod
+    def from_dataframe(cls, ticker, data):
+        """Build from a yfinance OHLCV DataFrame (handles tz-aware and multi-level columns)"""
+        if data is None or data.empty:
+            return cls.empty(ticker)
+
+        index = data.index
+        if getattr(index, 'tz', None) is not None:
+            # Keep the exchange-local calendar day rather than shifting to UTC
+            index = index.tz_localize(None)
+        dates = index.normalize().values.astype('datetime64[D]')
+
+        def column(name):
+            cols = [col for col in data.columns if name in str(col)]
+            return data[cols[0]].to_numpy(dtype=np.float64) if cols else np.full(len(data), np.nan)
+
+        order = np.argsort(dates, kind='stable')
+        return cls(ticker, dates[order], column('Open')[order], column('Close')[order])
+
+    def to_frame(self):
+        """
+        OHLCV DataFrame (naive DatetimeIndex) for tools that need one, e.g. Backtrader feeds
+
+        Only open and close are stored: High / Low bound the bar from those two and
+        Volume is 0, which is all market orders filled at the open need.
+        """
+        import pandas as pd
+
+        return pd.DataFrame({
+            'Open': self.open,
+            'High': np.fmax(self.open, self.close),
+            'Low': np.fmin(self.open, self.close),
+            'Close': self.close,
+            'Volume': np.zeros(len(self.dates)),
+        }, index=pd.DatetimeIndex(self.dates.astype('datetime64[ns]'), name='Date'))
+
+    @property
+    def nbytes(self):
+        return self.dates.nbytes + self.open.nbytes + self.close.nbytes + self.quality.nbytes
+
+    def __len__(self):
+        return len(self.dates)
+
+    def usable(self, price_type='close', skip_flags=DEFAULT_SKIP_FLAGS):
+        """Dates and prices with flagged points removed (built once per price type)"""
+        key = (price_type, skip_flags)
+        usable = self._usable.get(key)
+        if usable is None:
+            prices = self.open if price_type == 'open' else self.close
+            keep = (self.quality & skip_mask(price_type, skip_flags)) == 0
+            usable = self._usable[key] = (self.dates[keep], prices[keep])
+        return usable
+
+    def lookup(self, days, price_type='close', window_days=LOOKUP_WINDOW_DAYS, skip_flags=DEFAULT_SKIP_FLAGS):
+        """Nearest usable price within window_days of each requested day (ties go to the earlier day)"""
+        days = np.asarray(days, dtype='datetime64[D]')
+        result = np.full(days.shape, np.nan)
+
+        dates, prices = self.usable(price_type, skip_flags)
+        if len(dates) == 0 or len(days) == 0:
+            return result
+
+        right = np.searchsorted(dates, days)
+        left = right - 1
+        far = np.iinfo(np.int64).max
+
+        right_idx = np.minimum(right, len(dates) - 1)
+        left_idx = np.maximum(left, 0)
+        right_gap = np.where(right < len(dates), (dates[right_idx] - days).astype(np.int64), far)
+        left_gap = np.where(left >= 0, (days - dates[left_idx]).astype(np.int64), far)
+
+        use_left = left_gap <= right_gap
+        pick = np.where(use_left, left_idx, right_idx)
+        gap = np.where(use_left, left_gap, right_gap)
+
+        found = gap <= window_days
+        result[found] = prices[pick[found]]
+        return result
+
+
+class FetchError(Exception):
+    """Prices could not be downloaded (network error, rate limit) - unlike an empty history, worth retrying"""
+
+
+def fetch_history(ticker, start_date=DEFAULT_START_DATE, end_date=None, max_retries=3):
+    """
+    Download the full daily history for a ticker from Yahoo Finance
+
+    Returns an empty history when Yahoo has no prices for the ticker; raises
+    FetchError when every attempt failed, so callers can retry later.
+    """
+    import yfinance as yf
+
+    for attempt in range(max_retries):
+        try:
+            data = yf.Ticker(ticker).history(
+                start=start_date,
+                end=end_date,
+                interval='1d',
+                auto_adjust=True,
+                prepost=False
+            )
+            return PriceHistory.from_dataframe(ticker, data)
+        except Exception as e:
+            if attempt < max_retries - 1:
+                print(f"⚠️  Retry {attempt + 1} for {ticker}: {str(e)[:50]}...")
+                time.sleep(2 ** attempt)  # Exponential backoff
+                continue
+            raise FetchError(f"Could not download {ticker} after {max_retries} attempts: {str(e)[:50]}") from e
+
+
+class PriceStore:
+    """
+    Warm in-memory store of normalized price histories with LRU eviction
+
+    Lookup order is memory -> on-disk cache (one .npz per ticker) -> Yahoo Finance,
+    so a ticker's full history is fetched at most once across all tools sharing
+    the same cache directory.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=512 * 1024 * 1024,
+                 start_date=DEFAULT_START_DATE, fetcher=fetch_history):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.start_date = start_date
+        self.fetcher = fetcher
+
+        self._histories = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}  # ticker -> threading.Event, set once its load/fetch finished
+        self._expires = {}  # ticker -> time.monotonic() deadline, for empty histories only
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'disk_loads': 0,
+            'fetches': 0,
+            'updates': 0,
+        }
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __contains__(self, ticker):
+        return ticker in self._histories
+
+    def __len__(self):
+        return len(self._histories)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def _disk_path(self, ticker):
+        return disk_path(self.cache_dir, ticker)
+
+    def _load_from_disk(self, ticker):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as stored:
+                current = 'quality_version' in stored.files and stored['quality_version'] == QUALITY_VERSION
+                quality = stored['quality'] if current else None
+                return PriceHistory(ticker, stored['dates'], stored['open'], stored['close'], quality)
+        except Exception as e:
+            print(f"⚠️  Could not read cached prices for {ticker}: {str(e)[:50]}...")
+            return None
+
+    def _save_to_disk(self, history):
+        if not self.cache_dir or len(history) == 0:
+            return  # Empty histories may be temporary API failures - don't persist them
+        # Per-process temp file: several tools may write the same ticker into a shared cache directory
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, dates=history.dates, open=history.open, close=history.close, quality=history.quality,
+                         quality_version=QUALITY_VERSION)
+            os.replace(tmp_path, self._disk_path(history.ticker))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _insert(self, history):
+        with self._lock:
+            previous = self._histories.pop(history.ticker, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._histories[history.ticker] = history
+            self._bytes += history.nbytes
+            if len(history) == 0:
+                self._expires[history.ticker] = time.monotonic() + EMPTY_HISTORY_TTL
+            else:
+                self._expires.pop(history.ticker, None)
+
+            # Evict least recently used tickers, always keeping the one just inserted
+            while self._bytes > self.max_bytes and len(self._histories) > 1:
+                _, evicted = self._histories.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self._expires.pop(evicted.ticker, None)
+                self.stats['evictions'] += 1
+
+    def put(self, history, persist=True):
+        """Add or replace a ticker's history"""
+        self._insert(history)
+        if persist:
+            self._save_to_disk(history)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def history(self, ticker):
+        """
+        Get the full PriceHistory for a ticker, loading or fetching it once
+
+        Concurrent callers (daemon request threads) asking for the same missing
+        ticker wait for the one load/fetch in flight instead of repeating it.
+        Raises FetchError if the fetch failed; nothing is cached for the ticker then.
+        An empty history (no prices on Yahoo) is refetched after EMPTY_HISTORY_TTL,
+        so a long-running daemon does not hide a ticker for good.
+        """
+        ticker = str(ticker).strip().upper()
+
+        while True:
+            with self._lock:
+                if ticker in self._expires and time.monotonic() >= self._expires[ticker]:
+                    self._bytes -= self._histories.pop(ticker).nbytes
+                    del self._expires[ticker]
+                history = self._histories.get(ticker)
+                if history is not None:
+                    self._histories.move_to_end(ticker)
+                    self.stats['hits'] += 1
+                    return history
+                loading = self._loading.get(ticker)
+                if loading is None:
+                    loading = self._loading[ticker] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+            loading.wait()
+
+        try:
+            history = self._load_from_disk(ticker)
+            if history is not None:
+                self._count('disk_loads')
+                self._insert(history)
+                return history
+
+            history = self.fetcher(ticker, start_date=self.start_date)
+            self._count('fetches')
+            self.put(history)
+            return history
+        finally:
+            with self._lock:
+                del self._loading[ticker]
+            loading.set()
+
+    def update(self, ticker, through_day=None):
+        """
+        Append prices published since the history's last day (fetches only the recent days)
+
+        No fetch if the history already reaches through_day. The fetch starts
+        UPDATE_OVERLAP_DAYS before the last stored day; if the re-fetched closes on
+        the overlap differ from the stored ones (a split or dividend re-based the
+        adjusted history), the history is fetched in full instead of appended to.
+        """
+        history = self.history(ticker)
+        if len(history) == 0:
+            return history
+        last_day = history.dates[-1]
+        if through_day is not None and last_day >= through_day:
+            return history
+
+        new = self.fetcher(history.ticker, start_date=str(last_day - np.timedelta64(UPDATE_OVERLAP_DAYS, 'D')))
+        self._count('updates')
+        keep = new.dates > last_day
+        if not keep.any():
+            return history
+
+        # Compare the overlap with what is stored (no overlap at all: can't tell, refetch)
+        _, stored_idx, new_idx = np.intersect1d(history.dates, new.dates, assume_unique=True, return_indices=True)
+        stored_close, new_close = history.close[stored_idx], new.close[new_idx]
+        both = ~np.isnan(stored_close) & ~np.isnan(new_close)
+        rebased = not both.any() or bool(np.any(
+            np.abs(new_close[both] - stored_close[both]) > RESTATEMENT_TOLERANCE * np.abs(stored_close[both])))
+
+        updated = PriceHistory(
+            history.ticker,
+            np.concatenate([history.dates, new.dates[keep]]),
+            np.concatenate([history.open, new.open[keep]]),
+            np.concatenate([history.close, new.close[keep]])
+        )
+        if rebased:
+            refetched = self.fetcher(history.ticker, start_date=self.start_date)
+            self._count('fetches')
+            if len(refetched):
+                updated = refetched
+        self.put(updated)
+        return updated
+
+    def prices(self, ticker, dates, price_type='close'):
+        """Prices for one ticker on many dates (NaN where no price within the lookup window)"""
+        return self.history(ticker).lookup(to_days(dates), price_type)
+
+    def returns(self, events, strategies, price_type='close', with_status=False):
+        """
+        Batched strategy returns for many events
+
+        events: iterable of (event_date, ticker)
+        strategies: iterable of (buy_delay, sell_delay, asset)
+        Returns a (len(events), len(strategies)) float array, NaN where a price is missing.
+        Formula: (sell_price - buy_price) / buy_price
+        with_status=True also returns a same-shape uint8 array of result_matrix status
+        codes (FILLED, or why the cell could not be computed); cells with a buy/sell
+        day past the data horizon are then left NaN instead of using an earlier price,
+        and cells whose prices could not be fetched are left PENDING for a later run.
+        """
+        events = list(events)
+        strategies = list(strategies)
+        result = np.full((len(events), len(strategies)), np.nan)
+        status = np.full(result.shape, NO_DATA, dtype=np.uint8)
+        if not events or not strategies:
+            return (result, status) if with_status else result
+
+        event_days = to_days([event[0] for event in events])
+        tickers = np.array([str(event[1]).strip().upper() for event in events], dtype=object)
+
+        # Group work by the ticker actually priced, so each history is touched once
+        unique_tickers, inverse = np.unique(tickers, return_inverse=True)
+        rows_by_ticker = [np.nonzero(inverse == i)[0] for i in range(len(unique_tickers))]
+        all_rows = np.arange(len(events))
+
+        groups = {}
+        for col, (buy_delay, sell_delay, asset) in enumerate(strategies):
+            if asset == 'IYW':
+                groups.setdefault(BENCHMARK_TICKER, []).append((col, buy_delay, sell_delay, all_rows))
+                continue
+            for ticker, rows in zip(unique_tickers, rows_by_ticker):
+                groups.setdefault(ticker, []).append((col, buy_delay, sell_delay, rows))
+
+        horizon_day = None
+        if with_status:
+            try:
+                benchmark = self.history(BENCHMARK_TICKER)
+            except FetchError as e:
+                print(f"⚠️  {str(e)[:80]} - cells left pending")
+                status[:] = PENDING  # No data horizon to classify against
+                return result, status
+            horizon_day = benchmark.dates[-1] if len(benchmark) else None
+
+        for priced_ticker, jobs in groups.items():
+            try:
+                history = self.history(priced_ticker)
+            except FetchError as e:
+                print(f"⚠️  {str(e)[:80]} - cells left pending")
+                for col, _, _, rows in jobs:
+                    status[rows, col] = PENDING
+                continue
+            if len(history) == 0:
+                continue
+            for col, buy_delay, sell_delay, rows in jobs:
+                buy_days = trading_days_after(event_days[rows], buy_delay)
+                sell_days = trading_days_after(event_days[rows], sell_delay)
+                buy_prices = history.lookup(buy_days, price_type)
+                sell_prices = history.lookup(sell_days, price_type)
+                cell_returns = (sell_prices - buy_prices) / buy_prices
+
+                if with_status:
+                    # Not published yet: no stale nearby price, the maturity queue fills these later
+                    if horizon_day is not None:
+                        cell_returns[np.maximum(buy_days, sell_days) > horizon_day] = np.nan
+                    missing = np.isnan(cell_returns)
+                    cell_status = np.full(len(rows), FILLED, dtype=np.uint8)
+                    cell_status[missing] = classify_missing(history.dates, buy_days[missing],
+                                                            sell_days[missing], horizon_day)
+                    status[rows, col] = cell_status
+                result[rows, col] = cell_returns
+
+        return (result, status) if with_status else result
+
+    def get_stats(self):
+        """Cache counters plus current size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['tickers'] = len(self._histories)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,175 @@
+"""
+Row-indexed, memory-mapped result matrix for the fill run
+
+One float32 value matrix (rows = dataset rows, columns = strategy columns,
+NaN = not filled) plus a parallel uint8 status matrix, both np.memmap files
+in one directory. Writes are in-place stores into the mapped arrays, so any
+process that opens the directory can fill cells without copying frames or
+rewriting CSVs; the CSV/Parquet is produced once, by export().
+"""
+import json
+import os
+
+import numpy as np
+
+# Cell status codes
+PENDING = 0           # Missing in the dataset, not attempted yet
+FILLED = 1            # Value present (from the dataset or filled by the run)
+NO_DATA = 2           # Ticker has no prices, or no price near the buy/sell date
+DELISTED = 3          # Price history ends well before the data horizon
+OUT_OF_COVERAGE = 4   # Buy/sell date before the first price or past the data horizon
+
+STATUS_NAMES = {
+    PENDING: 'pending',
+    FILLED: 'filled',
+    NO_DATA: 'no_data',
+    DELISTED: 'delisted',
+    OUT_OF_COVERAGE: 'out_of_coverage',
+}
+
+DEFAULT_RESULTS_DIR = 'fill_results'
+FILLED_CSV = 'filled_returns_IMPROVED.csv'
+DELISTED_GAP_DAYS = 10  # History ending this long before the horizon counts as delisted
+
+_VALUES_FILE = 'values.f32'
+_STATUS_FILE = 'status.u8'
+_META_FILE = 'meta.json'
+
+
+def classify_missing(dates, buy_days, sell_days, horizon_day, window_days=5):
+    """
+    Status for cells whose return could not be computed
+
+    dates: the priced ticker's sorted trading days (empty if it has no prices)
+    horizon_day: last day any price is available for (e.g. the benchmark's last day)
+    """
+    status = np.full(len(buy_days), NO_DATA, dtype=np.uint8)
+    if len(dates) == 0 or len(buy_days) == 0:
+        return status
+
+    window = np.timedelta64(window_days, 'D')
+    first_day, last_day = dates[0], dates[-1]
+    latest = np.maximum(buy_days, sell_days)
+
+    past_end = latest > last_day + window
+    delisted = horizon_day is not None and last_day < horizon_day - np.timedelta64(DELISTED_GAP_DAYS, 'D')
+    if horizon_day is not None and not delisted:
+        past_end |= latest > horizon_day
+    status[past_end] = DELISTED if delisted else OUT_OF_COVERAGE
+    status[buy_days < first_day - window] = OUT_OF_COVERAGE
+    return status
+
+
+def _round_significant(values, digits):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = 10.0 ** (digits - 1 - np.floor(np.log10(np.abs(values))))
+        rounded = np.round(values * scale) / scale
+    return np.where(np.isfinite(rounded), rounded, values)
+
+
+def _float32_to_decimal(values):
+    """
+    float32 -> a short float64 decimal that reads back as the same float32,
+    so CSVs print 0.1 rather than 0.10000000149011612 (8 significant digits, else 9)
+    """
+    values = np.asarray(values, dtype=np.float32)
+    wide = values.astype(np.float64)
+    short = _round_significant(wide, 8)
+    return np.where(short.astype(np.float32) == values, short, _round_significant(wide, 9))
+
+
+class ResultMatrix:
+    """values[row, col] (float32, NaN = unfilled) and status[row, col] (uint8) on disk"""
+
+    def __init__(self, directory, mode='r+'):
+        self.directory = directory
+        with open(os.path.join(directory, _META_FILE)) as f:
+            self.meta = json.load(f)
+
+        self.columns = self.meta['columns']
+        self.n_rows = self.meta['n_rows']
+        shape = (self.n_rows, len(self.columns))
+        self.values = np.memmap(os.path.join(directory, _VALUES_FILE), dtype=np.float32, mode=mode, shape=shape)
+        self.status = np.memmap(os.path.join(directory, _STATUS_FILE), dtype=np.uint8, mode=mode, shape=shape)
+
+    @classmethod
+    def create(cls, directory, n_rows, columns, initial_values=None):
+        """
+        Allocate the matrices; initial_values (n_rows x columns, NaN = missing)
+        seeds them from the dataset, existing values being marked FILLED
+        """
+        os.makedirs(directory, exist_ok=True)
+        shape = (n_rows, len(columns))
+
+        values = np.memmap(os.path.join(directory, _VALUES_FILE), dtype=np.float32, mode='w+', shape=shape)
+        status = np.memmap(os.path.join(directory, _STATUS_FILE), dtype=np.uint8, mode='w+', shape=shape)
+        if initial_values is None:
+            values[:] = np.nan
+        else:
+            values[:] = initial_values
+        status[:] = np.where(np.isnan(values), PENDING, FILLED)
+        initial_pending = int(np.count_nonzero(status == PENDING))
+        values.flush()
+        status.flush()
+        del values, status
+
+        # Written last: a directory without meta.json is an incomplete create
+        meta = {'n_rows': n_rows, 'columns': list(columns), 'initial_pending': initial_pending}
+        with open(os.path.join(directory, _META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+        return cls(directory)
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, _META_FILE))
+
+    @classmethod
+    def open_or_create(cls, directory, frame, columns):
+        """Resume an existing matrix for this dataset, or seed a new one from frame"""
+        if cls.exists(directory):
+            matrix = cls(directory)
+            if matrix.n_rows == len(frame) and matrix.columns == list(columns):
+                return matrix
+            raise ValueError(f"{directory} holds results for a different dataset "
+                             f"({matrix.n_rows:,} rows) - remove it or pick another directory")
+        return cls.create(directory, len(frame), columns, frame[list(columns)].to_numpy(dtype=np.float32))
+
+    def set(self, row, col, value, status=FILLED):
+        """O(1) in-place store of one cell"""
+        self.values[row, col] = value
+        self.status[row, col] = status
+
+    def set_many(self, rows, cols, values, statuses):
+        """Vectorized in-place store of many cells"""
+        self.values[rows, cols] = values
+        self.status[rows, cols] = statuses
+
+    def pending(self, rows=None):
+        """Boolean (rows x columns) mask of cells still to attempt"""
+        status = self.status if rows is None else self.status[rows]
+        return status == PENDING
+
+    def flush(self):
+        self.values.flush()
+        self.status.flush()
+
+    def status_counts(self):
+        counts = np.bincount(np.asarray(self.status).ravel(), minlength=len(STATUS_NAMES))
+        return {name: int(counts[code]) for code, name in STATUS_NAMES.items()}
+
+    def export(self, frame, path=FILLED_CSV):
+        """Write frame with its missing result cells taken from the matrix - the only full serialization"""
+        self.flush()
+        for col, column_name in enumerate(self.columns):
+            # Dataset values are kept at full precision; the matrix only stores float32
+            values = _float32_to_decimal(self.values[:, col])
+            if column_name in frame:
+                frame[column_name] = frame[column_name].where(frame[column_name].notna(), values)
+            else:
+                frame[column_name] = values
+
+        if path.endswith('.parquet'):
+            frame.to_parquet(path, index=False)  # Needs pyarrow or fastparquet
+        else:
+            frame.to_csv(path, index=False)
+        return path
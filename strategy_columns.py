@@ -0,0 +1,39 @@
+"""Strategy definitions and CSV column mapping shared by the fill and analysis tools"""
+
+# Define the strategies and column mappings
+BUY_DELAYS = [1, 7, 14, 28]
+SELL_DELAYS = [30, 60]
+ASSETS = ['Stock', 'IYW']
+BENCHMARK_TICKER = 'IYW'
+
+# Events dataset used by the fill, find-active and backtest tools
+DATASET_CSV = "Testing Data for Upwork -- with Tickers -- R.csv"
+
+strategies = []
+for buy_delay in BUY_DELAYS:
+    for sell_delay in SELL_DELAYS:
+        for asset in ASSETS:
+            strategies.append((buy_delay, sell_delay, asset))
+
+# Create column mapping based on actual CSV structure
+column_mapping = {}
+for buy_delay in BUY_DELAYS:
+    for sell_delay in SELL_DELAYS:
+        # Stock columns - only B1S30 has "Return" prefix
+        if buy_delay == 1 and sell_delay == 30:
+            stock_col = f"Return B1S{sell_delay}"
+        elif buy_delay == 1:
+            stock_col = f"B1S{sell_delay}"
+        else:
+            stock_col = f"B{buy_delay}S{sell_delay}"
+        column_mapping[(buy_delay, sell_delay, 'Stock')] = stock_col
+
+        # IYW columns - only B1S30 has "IYW" prefix
+        if buy_delay == 1 and sell_delay == 30:
+            iyw_col = f"IYW B1S{sell_delay}"
+        elif buy_delay == 1:
+            iyw_col = f"B1S{sell_delay}.1"
+        else:
+            iyw_col = f"B{buy_delay}S{sell_delay}.1"
+        column_mapping[(buy_delay, sell_delay, 'IYW')] = iyw_col
+
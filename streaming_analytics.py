@@ -0,0 +1,437 @@
+import argparse
+import glob
+import json
+import math
+import os
+from multiprocessing import Pool
+
+import numpy as np
+
+from result_matrix import FILLED_CSV
+from strategy_columns import BUY_DELAYS, SELL_DELAYS, column_mapping
+
+ALL_YEARS = 'ALL'
+SERIES = ['Stock', 'IYW', 'Abnormal']  # Abnormal = stock return minus IYW return
+DEFAULT_CHUNKSIZE = 100000
+SUMMARY_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+STRATEGY_NAMES = [f"B{b}S{s}" for s in SELL_DELAYS for b in BUY_DELAYS]
+
+
+class RunningStats:
+    """Mergeable count / mean / variance / min / max (Chan et al. parallel update)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _combine(self, count, mean, m2, min_value, max_value):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.min = min(self.min, min_value)
+        self.max = max(self.max, max_value)
+
+    def update(self, values):
+        """Add a 1-D array of finite values"""
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        self._combine(len(values), mean, float(((values - mean) ** 2).sum()),
+                      float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 1 else math.nan
+
+    @property
+    def t_stat(self):
+        """t-statistic for mean != 0"""
+        if self.count < 2 or self.m2 == 0:
+            return math.nan
+        return self.mean / (self.std / math.sqrt(self.count))
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count, stats.mean, stats.m2 = data['count'], data['mean'], data['m2']
+        stats.min, stats.max = data['min'], data['max']
+        return stats
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy (log-spaced buckets)
+
+    Values are bucketed by ceil(log_gamma(|x|)), separately for positive and
+    negative values, so memory depends on the value range, not the row count.
+    Merging two sketches just adds bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _add_buckets(self, store, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        """Add a 1-D array of finite values"""
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        magnitudes = np.abs(values)
+        small = magnitudes < self.min_value
+        self.zero_count += int(small.sum())
+        self._add_buckets(self.positive, values[(values > 0) & ~small])
+        self._add_buckets(self.negative, -values[(values < 0) & ~small])
+
+    def merge(self, other):
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+
+        # Most negative first: largest magnitude keys of the negative store
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'min_value': self.min_value,
+            'positive': {str(k): v for k, v in self.positive.items()},
+            'negative': {str(k): v for k, v in self.negative.items()},
+            'zero_count': self.zero_count,
+            'count': self.count
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'], data['min_value'])
+        sketch.positive = {int(k): v for k, v in data['positive'].items()}
+        sketch.negative = {int(k): v for k, v in data['negative'].items()}
+        sketch.zero_count, sketch.count = data['zero_count'], data['count']
+        return sketch
+
+
+class Accumulator:
+    """Running stats plus a quantile sketch for one (strategy, series, year) cell"""
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch()
+
+    def update(self, values):
+        self.stats.update(values)
+        self.sketch.update(values)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self):
+        return {'stats': self.stats.to_dict(), 'sketch': self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = cls()
+        accumulator.stats = RunningStats.from_dict(data['stats'])
+        accumulator.sketch = QuantileSketch.from_dict(data['sketch'])
+        return accumulator
+
+
+def detect_layout(columns):
+    """
+    Find the return columns of a results file: ({strategy: (stock_col, iyw_col)}, date_col)
+
+    Supports the filled event CSV ('Return B1S30', 'IYW B1S30', 'B1S60.1', ...)
+    and the backtest export ('B1S30', 'IYW_B1S30', ...).
+    """
+    columns = set(columns)
+    pairs = {}
+    for buy_delay in BUY_DELAYS:
+        for sell_delay in SELL_DELAYS:
+            name = f"B{buy_delay}S{sell_delay}"
+            if 'Return B1S30' in columns:
+                pairs[name] = (column_mapping[(buy_delay, sell_delay, 'Stock')],
+                               column_mapping[(buy_delay, sell_delay, 'IYW')])
+            elif f"IYW_{name}" in columns:
+                pairs[name] = (name, f"IYW_{name}")
+
+    if 'date' in columns:
+        date_column = 'date'
+    elif 'event_date' in columns:
+        date_column = 'event_date'
+    else:
+        raise ValueError("No 'date' or 'event_date' column found")
+
+    if not pairs:
+        raise ValueError("No strategy return columns found")
+    return pairs, date_column
+
+
+def is_backtest_layout(pairs):
+    """
+    Backtest export: stock trades and IYW trades are on separate rows (IYW rows
+    have permno 0) and every cell without a trade holds a 0.0 placeholder
+    """
+    return all(iyw_col == f"IYW_{strategy}" for strategy, (_, iyw_col) in pairs.items())
+
+
+def benchmark_returns(path, pairs, date_column, chunksize=DEFAULT_CHUNKSIZE):
+    """IYW return per event date and strategy from a backtest export's IYW rows (NaN = no trade)"""
+    import pandas as pd
+
+    iyw_columns = [iyw_col for _, iyw_col in pairs.values()]
+    parts = [chunk[chunk['permno'] == 0]
+             for chunk in pd.read_csv(path, usecols=[date_column, 'permno'] + iyw_columns, chunksize=chunksize)]
+    frame = pd.concat(parts).drop_duplicates(date_column).set_index(date_column)[iyw_columns]
+    return frame.replace(0.0, np.nan)
+
+
+def event_years(dates):
+    """Years from YYYYMMDD ints or 'YYYY-MM-DD' strings"""
+    if dates.dtype.kind in 'iu':
+        return (dates.to_numpy() // 10000).astype(np.int64)
+    if dates.dtype.kind == 'f':
+        return (dates.fillna(0).to_numpy() // 10000).astype(np.int64)
+    return dates.astype(str).str[:4].astype(np.int64).to_numpy()
+
+
+class ReturnsSummary:
+    """Per-strategy and per-year aggregates that can be merged across shards and processes"""
+
+    def __init__(self):
+        self.accumulators = {}  # (strategy, series, year) -> Accumulator
+        self.rows = 0
+        self.empty_cells = 0  # Backtest export cells without a trade (0.0 placeholders, skipped)
+
+    def _accumulator(self, key):
+        accumulator = self.accumulators.get(key)
+        if accumulator is None:
+            accumulator = self.accumulators[key] = Accumulator()
+        return accumulator
+
+    def update_chunk(self, chunk, pairs, date_column, benchmark=None):
+        """
+        Fold one DataFrame chunk into the running aggregates
+
+        benchmark: benchmark_returns() of a backtest export. Stock returns then come
+        from the stock rows, IYW returns from the IYW rows, and Abnormal pairs each
+        stock row with the IYW trade of its event date; 0.0 placeholders are skipped.
+        """
+        self.rows += len(chunk)
+        years = event_years(chunk[date_column])
+        unique_years = np.unique(years)
+
+        if benchmark is not None:
+            is_benchmark = chunk['permno'].to_numpy() == 0
+            same_day_iyw = benchmark.reindex(chunk[date_column])
+
+        for strategy, (stock_col, iyw_col) in pairs.items():
+            stock = chunk[stock_col].to_numpy(dtype=np.float64)
+            iyw = chunk[iyw_col].to_numpy(dtype=np.float64)
+            abnormal_iyw = iyw
+
+            if benchmark is not None:
+                stock = np.where(is_benchmark | (stock == 0), np.nan, stock)
+                iyw = np.where(~is_benchmark | (iyw == 0), np.nan, iyw)
+                abnormal_iyw = same_day_iyw[iyw_col].to_numpy(dtype=np.float64)
+                self.empty_cells += int(np.isnan(stock[~is_benchmark]).sum() + np.isnan(iyw[is_benchmark]).sum())
+
+            for series, values in (('Stock', stock), ('IYW', iyw), ('Abnormal', stock - abnormal_iyw)):
+                finite = np.isfinite(values)
+                self._accumulator((strategy, series, ALL_YEARS)).update(values[finite])
+                for year in unique_years:
+                    mask = finite & (years == year)
+                    if mask.any():
+                        self._accumulator((strategy, series, int(year))).update(values[mask])
+
+    def merge(self, other):
+        for key, accumulator in other.accumulators.items():
+            self._accumulator(key).merge(accumulator)
+        self.rows += other.rows
+        self.empty_cells += other.empty_cells
+        return self
+
+    def to_frame(self):
+        """Summary table: one row per (strategy, series, year)"""
+        import pandas as pd
+
+        records = []
+        for (strategy, series, year), accumulator in self.accumulators.items():
+            stats, sketch = accumulator.stats, accumulator.sketch
+            record = {
+                'strategy': strategy,
+                'series': series,
+                'year': str(year),
+                'count': stats.count,
+                'mean': stats.mean if stats.count else math.nan,
+                'std': stats.std,
+                'variance': stats.variance,
+                't_stat': stats.t_stat,
+                'min': stats.min if stats.count else math.nan,
+                'max': stats.max if stats.count else math.nan,
+            }
+            for q in SUMMARY_QUANTILES:
+                record[f"p{int(q * 100):02d}"] = sketch.quantile(q)
+            records.append(record)
+
+        frame = pd.DataFrame(records)
+        if frame.empty:
+            return frame
+        order = {
+            '_strategy_order': frame['strategy'].map(STRATEGY_NAMES.index),
+            '_series_order': frame['series'].map(SERIES.index),
+            '_all_first': frame['year'] != ALL_YEARS,
+        }
+        frame = frame.assign(**order).sort_values(list(order) + ['year'])
+        return frame.drop(columns=list(order)).reset_index(drop=True)
+
+    def save_state(self, path):
+        """Write the mergeable state as JSON (combine later with load_state + merge)"""
+        state = {
+            'rows': self.rows,
+            'empty_cells': self.empty_cells,
+            'accumulators': [
+                {'key': [strategy, series, year], 'value': accumulator.to_dict()}
+                for (strategy, series, year), accumulator in self.accumulators.items()
+            ]
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load_state(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        summary = cls()
+        summary.rows = state['rows']
+        summary.empty_cells = state.get('empty_cells', 0)
+        for item in state['accumulators']:
+            summary.accumulators[tuple(item['key'])] = Accumulator.from_dict(item['value'])
+        return summary
+
+
+def summarize_file(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Stream one results CSV in chunks (constant memory) and return its ReturnsSummary"""
+    import pandas as pd
+
+    header = pd.read_csv(path, nrows=0)
+    pairs, date_column = detect_layout(header.columns)
+    usecols = [date_column] + [col for pair in pairs.values() for col in pair]
+
+    # Backtest export: one small first pass collects the IYW rows (one per event date)
+    benchmark = None
+    if is_backtest_layout(pairs):
+        benchmark = benchmark_returns(path, pairs, date_column, chunksize)
+        usecols.append('permno')
+
+    summary = ReturnsSummary()
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        summary.update_chunk(chunk, pairs, date_column, benchmark)
+    return summary
+
+
+def _summarize_input(args):
+    path, chunksize = args
+    if path.endswith('.json'):
+        return ReturnsSummary.load_state(path)
+    return summarize_file(path, chunksize)
+
+
+def summarize_files(paths, chunksize=DEFAULT_CHUNKSIZE, processes=1):
+    """Summarize many shard files (CSV or saved .json states), in parallel if requested"""
+    jobs = [(path, chunksize) for path in paths]
+    summary = ReturnsSummary()
+
+    if processes > 1 and len(jobs) > 1:
+        with Pool(processes) as pool:
+            for shard_summary in pool.imap_unordered(_summarize_input, jobs):
+                summary.merge(shard_summary)
+    else:
+        for job in jobs:
+            summary.merge(_summarize_input(job))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming per-strategy / per-year return summary")
+    parser.add_argument('inputs', nargs='*', help="Result CSVs, glob patterns, or saved .json states")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--output', default='returns_summary.csv', help="Summary CSV to write")
+    parser.add_argument('--save-state', default=None, help="Also write mergeable JSON state here")
+    args = parser.parse_args()
+
+    # Default: the fill run's export, else per-batch files from older runs
+    patterns = args.inputs or [FILLED_CSV if os.path.exists(FILLED_CSV) else 'batch_result_IMPROVED_*.csv']
+    paths = sorted({path for pattern in patterns for path in (glob.glob(pattern) or [pattern])})
+
+    print(f"📊 Summarizing {len(paths):,} input file(s) in chunks of {args.chunksize:,} rows...")
+    summary = summarize_files(paths, args.chunksize, args.processes)
+
+    frame = summary.to_frame()
+    frame.to_csv(args.output, index=False)
+    print(f"✅ Rows processed: {summary.rows:,}")
+    print(f"💾 Summary saved to {args.output} ({len(frame):,} rows)")
+
+    if args.save_state:
+        summary.save_state(args.save_state)
+        print(f"💾 Mergeable state saved to {args.save_state}")
+
+    overall = frame[frame['year'] == ALL_YEARS]
+    if not overall.empty:
+        print(f"\n📈 Overall means and t-stats:")
+        print(overall[['strategy', 'series', 'count', 'mean', 't_stat', 'p50']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
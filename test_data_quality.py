@@ -0,0 +1,35 @@
+import numpy as np
+
+from data_quality import SPIKE, SPLIT_JUMP, compute_quality_mask
+from price_store import PriceHistory
+
+# One week of daily prices (no network)
+DAYS = np.arange(np.datetime64('2020-01-01'), np.datetime64('2020-01-08'))
+OPENS = np.full(len(DAYS), 100.0)
+
+
+def test_reverting_spike_is_skipped():
+    """A one-day split-sized jump that reverts is a bad print: flagged SPIKE and skipped by lookups"""
+    closes = np.array([100, 101, 300, 102, 103, 104, 105], dtype=float)
+    mask = compute_quality_mask(DAYS, OPENS, closes)
+    assert mask.tolist() == [0, 0, SPIKE, 0, 0, 0, 0]
+
+    history = PriceHistory('SPIKY', DAYS, OPENS, closes)
+    assert history.lookup(DAYS[2:3])[0] == 101.0  # Nearest usable close (ties go to the earlier day)
+
+
+def test_sustained_move_is_kept():
+    """A split-sized move that stays (crash, or unadjusted split) is informational only: prices still used"""
+    closes = np.array([100, 102, 50, 45, 44, 43, 42], dtype=float)
+    mask = compute_quality_mask(DAYS, OPENS, closes)
+    assert mask.tolist() == [0, 0, SPLIT_JUMP, 0, 0, 0, 0]
+
+    history = PriceHistory('CRASH', DAYS, OPENS, closes)
+    assert history.lookup(DAYS[2:4]).tolist() == [50.0, 45.0]
+
+
+if __name__ == "__main__":
+    print("🎯 Quality mask: reverting spike vs sustained move...")
+    test_reverting_spike_is_skipped()
+    test_sustained_move_is_kept()
+    print("✅ Spikes skipped, sustained moves kept")
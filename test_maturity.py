@@ -0,0 +1,122 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import maturity
+from price_store import PriceHistory, PriceStore
+from result_matrix import DELISTED, FILLED, OUT_OF_COVERAGE, ResultMatrix
+from strategy_columns import column_mapping, strategies
+
+# Fake Yahoo (no network): what has been published as of TODAY[0]
+TODAY = [np.datetime64('2024-03-01')]
+LAG_DAYS = 8  # LAG publishes a week late: past the lookup window, not long enough to look delisted
+
+
+def fetcher(ticker, start_date='2020-01-01', end_date=None):
+    days = np.arange(np.datetime64(start_date[:10]), TODAY[0] + 1)
+    days = days[np.is_busday(days)]
+    if ticker == 'LAG':
+        days = days[days <= TODAY[0] - np.timedelta64(LAG_DAYS, 'D')]
+    if ticker == 'GONE':
+        days = days[days <= np.datetime64('2024-03-01')]  # Stops trading after the fill
+    prices = 100 + (days - np.datetime64('2020-01-01')).astype(np.int64) * 0.01
+    return PriceHistory(ticker, days, prices, prices + 0.5)
+
+
+def fill(directory, store):
+    """What the fill run leaves behind: the events CSV and the result matrix"""
+    columns = [column_mapping[strategy] for strategy in strategies]
+    df = pd.DataFrame({'date': [20231201, 20240226, 20240205, 20240220], 'ticker': ['AAA', 'AAA', 'LAG', 'GONE']})
+    for column in columns:
+        df[column] = np.nan
+    csv_path = os.path.join(directory, 'events.csv')
+    df.to_csv(csv_path, index=False)
+
+    results = ResultMatrix.create(os.path.join(directory, 'results'), len(df), columns,
+                                  df[columns].to_numpy(dtype=np.float32))
+    events = [(pd.Timestamp(str(day)), ticker) for day, ticker in zip(df['date'], df['ticker'])]
+    values, status = store.returns(events, strategies, with_status=True)
+    results.set_many(*np.nonzero(results.pending()), values[results.pending()], status[results.pending()])
+    results.flush()
+    return results, events, csv_path
+
+
+def test_daily_update_fills_requeues_and_delists():
+    """Matured cells are filled, lagging tickers re-queued, stopped tickers delisted; final values == fresh fill"""
+    TODAY[0] = np.datetime64('2024-03-01')
+    store = PriceStore(cache_dir=None, fetcher=fetcher)  # Empty injected store must be used, not replaced
+    with tempfile.TemporaryDirectory() as directory:
+        results, events, csv_path = fill(directory, store)
+        results_dir = results.directory
+        assert (np.asarray(results.status)[0] == FILLED).all()
+        assert (np.asarray(results.status)[1:] == OUT_OF_COVERAGE).any()
+
+        # LAG's 30-day sells (2024-03-06) have matured on the benchmark but LAG has not published them yet
+        TODAY[0] = np.datetime64('2024-03-08')
+        stats = maturity.daily_update(results_dir, store, csv_path=csv_path)
+        assert stats['horizon_day'] == TODAY[0]
+        assert stats['requeued'] == 4 and stats['filled'] == stats['matured'] - 4
+        assert store.get_stats()['fetches'] > 0  # The injected store did the work
+
+        TODAY[0] = np.datetime64('2024-05-01')
+        stats = maturity.daily_update(results_dir, store, csv_path=csv_path)
+        assert stats['requeued'] == 0 and stats['waiting'] == 0
+
+        results = ResultMatrix(results_dir)
+        status = np.asarray(results.status)
+        stock_cols = [col for col, strategy in enumerate(strategies) if strategy[2] == 'Stock']
+        assert (status[3, stock_cols] == DELISTED).all()
+        assert (np.delete(status, 3, axis=0) == FILLED).all()
+
+        # Same numbers as filling everything today from scratch
+        fresh_values, _ = PriceStore(cache_dir=None, fetcher=fetcher).returns(events, strategies, with_status=True)
+        filled = status == FILLED
+        assert np.allclose(np.asarray(results.values)[filled], fresh_values[filled].astype(np.float32), atol=1e-6)
+
+
+def test_build_queues_lagging_out_of_coverage_cells():
+    """A matured out-of-coverage cell whose ticker lags its sell day is queued for the next day"""
+    TODAY[0] = np.datetime64('2024-03-08')
+    store = PriceStore(cache_dir=None, fetcher=fetcher)
+    with tempfile.TemporaryDirectory() as directory:
+        results, _, _ = fill(directory, store)
+        df = pd.read_csv(os.path.join(directory, 'events.csv'))
+        horizon_day = store.history('IYW').dates[-1]
+        queue = maturity.MaturityQueue.build(results, df, horizon_day, store)
+
+        lagging = (queue.ticker == 'LAG') & (queue.mature_day == horizon_day + np.timedelta64(1, 'D'))
+        assert lagging.sum() == 4
+        assert (queue.mature_day > horizon_day).all()
+
+
+def test_update_refetches_rebased_history():
+    """A 3:2 split re-bases the adjusted history: update() refetches it instead of appending to stale prices"""
+    factor = [1.0]
+
+    def split_fetcher(ticker, start_date='2020-01-01', end_date=None):
+        history = fetcher(ticker, start_date, end_date)
+        before = history.dates < np.datetime64('2024-03-06')
+        return PriceHistory(ticker, history.dates, np.where(before, history.open * factor[0], history.open),
+                            np.where(before, history.close * factor[0], history.close))
+
+    for new_factor, expected_fetches in ((1.0, 1), (1 / 1.5, 2)):
+        TODAY[0], factor[0] = np.datetime64('2024-03-01'), 1.0
+        store = PriceStore(cache_dir=None, fetcher=split_fetcher)
+        store.history('AAA')
+        TODAY[0], factor[0] = np.datetime64('2024-03-08'), new_factor
+
+        updated = store.update('AAA')
+        assert store.get_stats()['fetches'] == expected_fetches
+        assert np.allclose(updated.close, split_fetcher('AAA', store.start_date).close)
+
+
+if __name__ == "__main__":
+    print("🎯 Daily update: fill, re-queue and delisted paths...")
+    test_daily_update_fills_requeues_and_delists()
+    test_build_queues_lagging_out_of_coverage_cells()
+    print("✅ Matured cells filled like a fresh run")
+    print("🎯 Incremental price update after a split...")
+    test_update_refetches_rebased_history()
+    print("✅ Re-based history fetched in full")
@@ -1,7 +1,11 @@
-import yfinance as yf
-import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 
+from price_store import LOOKUP_WINDOW_DAYS, PriceStore, to_day
+
+# Same shared price store as the fill script - no direct Yahoo downloads
+store = PriceStore()
+
 def test_orcl_specific():
     """Test ORCL specifically with the exact same logic as production script"""
     
@@ -47,57 +51,30 @@ def test_orcl_specific():
         return None
 
 def get_price_on_date(date, ticker):
-    """Get price for ticker on specific date - same logic as production"""
+    """Get price for ticker on specific date - same lookup as production (shared price store)"""
     try:
-        # Create date range (get a few days to ensure we have data)
-        start_date = date - timedelta(days=5)
-        end_date = date + timedelta(days=5)
-        
-        print(f"      Downloading {ticker} from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+        # Full history from the price store (disk cache first, one download otherwise)
+        print(f"      Loading {ticker} from the price store ({store.cache_dir}/)")
+        history = store.history(ticker)
         
-        data = yf.download(ticker, start=start_date, end=end_date, progress=False)
-        
-        if data.empty:
+        if len(history) == 0:
             print(f"      ❌ No data returned for {ticker}")
             return None
         
-        print(f"      ✅ Got {len(data)} days of data")
-        print(f"      📊 Columns: {list(data.columns)}")
-        print(f"      📅 Date range: {data.index[0].strftime('%Y-%m-%d')} to {data.index[-1].strftime('%Y-%m-%d')}")
-        
-        # Find the exact date or the closest available date
-        target_date = pd.Timestamp(date.date())
+        print(f"      ✅ Got {len(history)} days of data")
+        print(f"      📅 Date range: {history.dates[0]} to {history.dates[-1]}")
         
-        if target_date in data.index:
-            print(f"      🎯 Found exact date {target_date.strftime('%Y-%m-%d')}")
-            # Access multi-level columns correctly: ('Close', 'TICKER')
-            close_cols = [col for col in data.columns if 'Close' in str(col)]
-            if close_cols:
-                print(f"      📈 Using close column: {close_cols[0]}")
-                price = data.loc[target_date, close_cols[0]]
-                return float(price)
-            else:
-                print(f"      ❌ No Close column found")
-                return None
+        # Exact date, or the closest usable close within the production lookup window
+        target_day = to_day(date)
+        if target_day in history.dates:
+            print(f"      🎯 Found exact date {target_day}")
         else:
-            print(f"      🔍 Target date {target_date.strftime('%Y-%m-%d')} not found, finding closest...")
-            # Find closest date
-            available_dates = data.index
-            if len(available_dates) > 0:
-                closest_date = min(available_dates, key=lambda x: abs(x - target_date))
-                print(f"      🎯 Using closest date: {closest_date.strftime('%Y-%m-%d')}")
-                
-                close_cols = [col for col in data.columns if 'Close' in str(col)]
-                if close_cols:
-                    print(f"      📈 Using close column: {close_cols[0]}")
-                    price = data.loc[closest_date, close_cols[0]]
-                    return float(price)
-                else:
-                    print(f"      ❌ No Close column found")
-                    return None
-            
+            print(f"      🔍 Target date {target_day} not found, using closest within {LOOKUP_WINDOW_DAYS} days...")
+        price = history.lookup(np.array([target_day]), 'close')[0]
+        if np.isnan(price):
             print(f"      ❌ No available dates")
             return None
+        return float(price)
                 
     except Exception as e:
         print(f"      ❌ Error getting price for {ticker} on {date}: {e}")
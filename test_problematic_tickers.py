@@ -1,7 +1,10 @@
-import yfinance as yf
-import pandas as pd
 from datetime import datetime, timedelta
 
+from price_store import PriceStore, to_day
+
+# Same shared price store as the fill script - no direct Yahoo downloads
+store = PriceStore()
+
 def test_ticker_data(ticker, test_date_str):
     """Test if we can get data for a specific ticker and date"""
     print(f"\n🔍 Testing {ticker} around {test_date_str}")
@@ -12,14 +15,13 @@ def test_ticker_data(ticker, test_date_str):
     end_date = test_date + timedelta(days=5)
     
     try:
-        data = yf.download(ticker, start=start_date, end=end_date, progress=False)
-        if not data.empty:
-            print(f"✅ SUCCESS: Got {len(data)} days of data")
-            print(f"   Date range: {data.index[0].strftime('%Y-%m-%d')} to {data.index[-1].strftime('%Y-%m-%d')}")
-            if 'Close' in data.columns:
-                print(f"   Sample prices: {data['Close'].iloc[0]:.2f} to {data['Close'].iloc[-1]:.2f}")
-            elif ('Close', ticker) in data.columns:
-                print(f"   Sample prices: {data[('Close', ticker)].iloc[0]:.2f} to {data[('Close', ticker)].iloc[-1]:.2f}")
+        history = store.history(ticker)
+        window = (history.dates >= to_day(start_date)) & (history.dates < to_day(end_date))
+        if window.any():
+            dates, closes = history.dates[window], history.close[window]
+            print(f"✅ SUCCESS: Got {len(dates)} days of data")
+            print(f"   Date range: {dates[0]} to {dates[-1]}")
+            print(f"   Sample prices: {closes[0]:.2f} to {closes[-1]:.2f}")
             return True
         else:
             print("❌ FAILED: No data returned")
@@ -48,10 +50,10 @@ for ticker, date in test_cases:
 
 print(f"\n📊 Summary: {success_count}/{total_tests} tests successful ({success_count/total_tests*100:.1f}%)")
 
-# Test the current column structure for IYW
+# Test the normalized frame the store hands to the backtest for IYW
 print(f"\n🔍 Testing IYW column structure...")
 try:
-    data = yf.download("IYW", start="2014-02-05", end="2014-02-15", progress=False)
+    data = store.history("IYW").to_frame().loc["2014-02-05":"2014-02-14"]
     if not data.empty:
         print(f"✅ IYW columns: {list(data.columns)}")
         print(f"   Data shape: {data.shape}")
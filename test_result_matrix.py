@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from price_store import FetchError, PriceHistory, PriceStore
+from result_matrix import FILLED, NO_DATA, PENDING, ResultMatrix
+
+# Filled values that print with float32 noise if exported naively (0.10000000149011612)
+FILLED_VALUES = np.array([0.1, 0.25, -0.3, 1 / 3, 12345.678, 1e-7], dtype=np.float32)
+
+
+def test_export_precision():
+    """Dataset values keep full precision; filled cells export short and read back as the stored float32"""
+    frame = pd.DataFrame({
+        'date': np.arange(len(FILLED_VALUES)),
+        'a': [0.123456789012345] + [np.nan] * (len(FILLED_VALUES) - 1),
+        'b': np.nan,
+    })
+    with tempfile.TemporaryDirectory() as directory:
+        matrix = ResultMatrix.create(directory, len(frame), ['a', 'b'], frame[['a', 'b']].to_numpy(dtype=np.float32))
+        rows = np.arange(len(FILLED_VALUES))
+        matrix.set_many(rows, np.ones(len(rows), dtype=np.int64), FILLED_VALUES, np.full(len(rows), FILLED, np.uint8))
+        path = matrix.export(frame.copy(), os.path.join(directory, 'filled.csv'))
+
+        exported = pd.read_csv(path)
+        with open(path) as f:
+            text = f.read()
+
+    assert exported['a'][0] == 0.123456789012345
+    assert exported['a'][1:].isna().all()
+    assert np.array_equal(exported['b'].to_numpy(dtype=np.float32), FILLED_VALUES)
+    assert '0.10000000149' not in text
+
+
+def test_failed_fetch_stays_pending():
+    """A failed download leaves cells PENDING (retried on resume); a ticker without prices is NO_DATA"""
+    def fetcher(ticker, start_date=None, end_date=None):
+        if ticker == 'DOWN':
+            raise FetchError(f"Could not download {ticker}")
+        days = np.arange(np.datetime64('2023-01-01'), np.datetime64('2023-06-01'))
+        days = days[np.is_busday(days)] if ticker != 'NONE' else days[:0]
+        return PriceHistory(ticker, days, np.linspace(10, 20, len(days)), np.linspace(10, 20, len(days)))
+
+    store = PriceStore(cache_dir=None, fetcher=fetcher)
+    events = [(pd.Timestamp('2023-02-01'), ticker) for ticker in ('AAA', 'DOWN', 'NONE')]
+    strategies = [(1, 30, 'Stock'), (1, 30, 'IYW')]
+    values, status = store.returns(events, strategies, with_status=True)
+
+    assert status.tolist() == [[FILLED, FILLED], [PENDING, FILLED], [NO_DATA, FILLED]]
+    assert np.isnan(values[1:, 0]).all() and not np.isnan(values[:, 1]).any()
+
+
+if __name__ == "__main__":
+    print("🎯 Result matrix export precision...")
+    test_export_precision()
+    print("✅ Dataset values exact, filled cells round-trip as float32")
+    print("🎯 Failed fetch vs no data...")
+    test_failed_fetch_stays_pending()
+    print("✅ Failed fetches stay pending")
@@ -1,7 +1,10 @@
-import yfinance as yf
-import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-import time
+
+from price_store import PriceStore, to_day
+
+# Same shared price store as the fill script - no direct Yahoo downloads
+store = PriceStore()
 
 def test_single_calculation():
     """Test calculating one specific return value"""
@@ -28,53 +31,31 @@ def test_single_calculation():
         print(f"   Buy date: {buy_date.strftime('%Y-%m-%d')}")
         print(f"   Sell date: {sell_date.strftime('%Y-%m-%d')}")
         
-        # Get buy price
-        print(f"\n📈 Getting buy price...")
-        buy_start = buy_date - timedelta(days=3)
-        buy_end = buy_date + timedelta(days=3)
+        # Full history from the shared price store (disk cache first, one download otherwise)
+        print(f"\n📥 Loading {ticker} from the price store ({store.cache_dir}/)...")
+        history = store.history(ticker)
         
-        print(f"   Downloading {ticker} from {buy_start.strftime('%Y-%m-%d')} to {buy_end.strftime('%Y-%m-%d')}")
-        buy_data = yf.download(ticker, start=buy_start, end=buy_end, progress=False)
-        
-        if buy_data.empty:
-            print(f"   ❌ No buy data")
+        if len(history) == 0:
+            print(f"   ❌ No price data")
             return None
             
-        print(f"   ✅ Got {len(buy_data)} days of buy data")
+        print(f"   ✅ Got {len(history)} days of data ({history.dates[0]} to {history.dates[-1]})")
         
-        # Find buy price
-        buy_target = pd.Timestamp(buy_date.date())
-        if buy_target in buy_data.index:
-            close_col = [col for col in buy_data.columns if 'Close' in str(col)][0]
-            buy_price = float(buy_data.loc[buy_target, close_col])
-            print(f"   💰 Buy price: ${buy_price:.2f}")
-        else:
+        # Get buy price (exact date only)
+        print(f"\n📈 Getting buy price...")
+        buy_price = history.lookup(np.array([to_day(buy_date)]), 'close', window_days=0)[0]
+        if np.isnan(buy_price):
             print(f"   ❌ Buy date not found in data")
             return None
+        print(f"   💰 Buy price: ${buy_price:.2f}")
             
-        # Get sell price
+        # Get sell price (exact date only)
         print(f"\n📉 Getting sell price...")
-        sell_start = sell_date - timedelta(days=3)
-        sell_end = sell_date + timedelta(days=3)
-        
-        print(f"   Downloading {ticker} from {sell_start.strftime('%Y-%m-%d')} to {sell_end.strftime('%Y-%m-%d')}")
-        sell_data = yf.download(ticker, start=sell_start, end=sell_end, progress=False)
-        
-        if sell_data.empty:
-            print(f"   ❌ No sell data")
-            return None
-            
-        print(f"   ✅ Got {len(sell_data)} days of sell data")
-        
-        # Find sell price
-        sell_target = pd.Timestamp(sell_date.date())
-        if sell_target in sell_data.index:
-            close_col = [col for col in sell_data.columns if 'Close' in str(col)][0]
-            sell_price = float(sell_data.loc[sell_target, close_col])
-            print(f"   💰 Sell price: ${sell_price:.2f}")
-        else:
+        sell_price = history.lookup(np.array([to_day(sell_date)]), 'close', window_days=0)[0]
+        if np.isnan(sell_price):
             print(f"   ❌ Sell date not found in data")
             return None
+        print(f"   💰 Sell price: ${sell_price:.2f}")
             
         # Calculate return
         return_value = (sell_price - buy_price) / buy_price
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import vectorized_backtest as vb
+from streaming_analytics import ALL_YEARS, summarize_file
+from test_vectorized_backtest import make_dataset
+
+
+def brute_force(frame, name):
+    """Stock, IYW and abnormal returns of one strategy from the whole export in memory (0 = no trade)"""
+    stock_rows = frame[frame['permno'] != 0]
+    iyw_rows = frame[frame['permno'] == 0].drop_duplicates('event_date').set_index('event_date')
+    stock = stock_rows[name].replace(0, np.nan)
+    iyw = iyw_rows[f"IYW_{name}"].replace(0, np.nan)
+    abnormal = stock.to_numpy() - iyw.reindex(stock_rows['event_date']).to_numpy()
+    return {'Stock': stock.dropna(), 'IYW': iyw.dropna(), 'Abnormal': pd.Series(abnormal).dropna()}
+
+
+def test_summarize_backtest_export():
+    """Streaming summary of the backtest export (IYW on separate rows) == pandas on the whole file"""
+    events_data, price_data, reference = make_dataset()
+    result = vb.VectorizedTedSimulator(events_data, price_data, reference, verbose=False).run()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = result.export_csv(os.path.join(directory, 'backtest.csv'))
+        frame = pd.read_csv(path)
+        summary = summarize_file(path, chunksize=37)  # Stock rows and their IYW row fall in different chunks
+
+    table = summary.to_frame()
+    table = table[table['year'] == ALL_YEARS].set_index(['strategy', 'series'])
+    for name in ('B1S30', 'B28S60'):
+        for series, values in brute_force(frame, name).items():
+            row = table.loc[(name, series)]
+            assert row['count'] == len(values) > 0, (name, series)
+            assert np.isclose(row['mean'], values.mean()), (name, series)
+
+
+if __name__ == "__main__":
+    print("🎯 Streaming summary of a backtest export vs pandas...")
+    test_summarize_backtest_export()
+    print("✅ Counts and means match")
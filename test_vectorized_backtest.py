@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from datetime import timedelta
+
+import vectorized_backtest as vb
+
+# Synthetic prices (no network): 40 tickers, some delisted early or with missing days
+N_TICKERS = 40
+N_EVENTS = 600
+
+
+def make_prices(seed, start='2002-01-01', end='2003-06-30', missing=0.0):
+    """Random-walk OHLCV frame on business days, tz-aware like yfinance"""
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start, end)
+    days = days[rng.random(len(days)) >= missing]
+    prices = np.exp(np.cumsum(rng.normal(0, 0.02, len(days)))) * rng.uniform(0.5, 80)
+    return pd.DataFrame({'Open': prices, 'High': prices, 'Low': prices, 'Close': prices * 1.001, 'Volume': 1},
+                        index=days.tz_localize('America/New_York'))
+
+
+def make_dataset(seed=1, n_events=N_EVENTS):
+    """(events_data, price_data, reference_data) in the notebook's formats"""
+    rng = np.random.default_rng(seed)
+    tickers = [f"T{i}" for i in range(N_TICKERS)]
+    price_data = {
+        ticker: make_prices(i, end='2002-09-01' if i % 7 == 0 else '2003-06-30', missing=0.1 if i % 5 == 0 else 0.0)
+        for i, ticker in enumerate(tickers)
+    }
+    price_data['IYW'] = make_prices(999)
+
+    # Reference feed with a few holidays
+    reference = make_prices(1000)
+    reference = reference[rng.random(len(reference)) >= 0.03]
+
+    event_days = pd.bdate_range('2002-01-15', '2003-03-01')
+    events_data = [
+        (int(rng.integers(1, 30)), pd.Timestamp(day).strftime('%Y%m%d'),
+         tickers[rng.integers(0, N_TICKERS)] if rng.random() > 0.05 else 'ZZZ')  # ZZZ: no price data
+        for day in rng.choice(event_days, n_events)
+    ]
+    # Duplicate event, non-positive permno, bad date
+    events_data += [(5, '20020301', 'T1'), (5, '20020301', 'T1'), (0, '20020301', 'T2'), (3, 'bad', 'T3')]
+    return events_data, price_data, reference
+
+
+def reference_backtest(events_data, price_data, reference_data, start_cash=1000000, commission=0.001, **params):
+    """
+    Literal day-by-day TedEventStudyRealData + BackBroker loop (what Cerebro runs)
+
+    Returns (daily portfolio values, {event_key: {result column: return}}) for
+    comparison with VectorizedTedSimulator.
+    """
+    p = dict(vb.DEFAULT_PARAMS)
+    p.update(params)
+    histories = {ticker: vb._to_history(ticker, frame) for ticker, frame in price_data.items()}
+    reference = vb._to_history('REFERENCE', reference_data)
+    trading_days = [pd.Timestamp(day).date() for day in reference.dates]
+
+    def get_robust_price(ticker, day, day_idx):
+        if ticker not in histories:
+            return float(reference.open[day_idx])  # No data: the reference feed's open
+        price = histories[ticker].lookup(np.array([np.datetime64(day, 'D')]), 'open', p['data_lookback_days'])[0]
+        return None if np.isnan(price) else float(price)
+
+    # preprocess_complete_dataset: trades by buy date, stock trade then IYW trade per strategy
+    events_by_date = defaultdict(list)
+    for permno, date_str, ticker in events_data:
+        ticker = str(ticker).strip().upper()
+        if not (len(str(date_str)) == 8 and str(date_str).isdigit()) or not ticker or int(permno) <= 0:
+            continue
+        event_date = pd.Timestamp(str(date_str)).date()
+        for name, strategy in p['strategies'].items():
+            buy_date = event_date + timedelta(days=strategy['buy_delay'])
+            sell_date = buy_date + timedelta(days=strategy['sell_delay'])
+            for trade_ticker, trade_permno, trade_type in ((ticker, int(permno), 'stock'), ('IYW', 0, 'benchmark')):
+                events_by_date[buy_date].append(dict(
+                    ticker=trade_ticker, permno=trade_permno, event_date=event_date, sell_date=sell_date,
+                    strategy=name, trade_type=trade_type, has_data=trade_ticker in price_data))
+
+    cash, position = float(start_cash), 0
+    pending_orders, active, scheduled_sells = [], {}, defaultdict(list)
+    executed, results, values = set(), {}, []
+
+    for i, day in enumerate(trading_days):
+        # Broker: accept yesterday's orders against cash at submission price, fill at today's open
+        if pending_orders:
+            pseudo_cash, accepted = cash, []
+            for size, price in pending_orders:
+                pseudo_cash -= size * price + commission * abs(size * price)
+                if pseudo_cash >= 0:
+                    accepted.append(size)
+            for size in accepted:
+                cash -= size * reference.open[i] + commission * abs(size * reference.open[i])
+                position += size
+        value = cash + position * reference.close[i]
+        values.append(value)
+        orders = []
+
+        # Scheduled sells (no price: try again the next calendar day)
+        for key in list(scheduled_sells.get(day, [])):
+            scheduled_sells[day].remove(key)
+            if key not in active:
+                continue
+            trade = active[key]
+            sell_price = get_robust_price(trade['ticker'], day, i)
+            if sell_price is None or sell_price <= 0:
+                scheduled_sells[day + timedelta(days=1)].append(key)
+                continue
+            orders.append((-trade['shares'], reference.close[i]))
+            event_key = f"{trade['permno']}_{trade['event_date']}_{trade['ticker']}"
+            column = trade['strategy'] if trade['trade_type'] == 'stock' else f"IYW_{trade['strategy']}"
+            results.setdefault(event_key, {})[column] = (sell_price - trade['buy_price']) / trade['buy_price']
+            del active[key]
+
+        # New buys
+        daily_trades = 0
+        for trade in events_by_date.get(day, []):
+            key = f"{trade['permno']}_{trade['strategy']}_{trade['event_date']}_{trade['trade_type']}"
+            if key in executed:
+                continue
+            if daily_trades >= p['max_daily_trades'] or len(active) >= p['max_total_positions']:
+                break
+            if not trade['has_data']:
+                continue
+            buy_price = get_robust_price(trade['ticker'], day, i)
+            if buy_price is None or buy_price <= 0:
+                continue
+            shares = int(min(1000, value * 0.005) / buy_price)
+            if shares <= 0:
+                continue
+            orders.append((shares, reference.close[i]))
+            active[key] = dict(trade, shares=shares, buy_price=buy_price)
+            scheduled_sells[trade['sell_date']].append(key)
+            executed.add(key)
+            daily_trades += 1
+        pending_orders = orders
+
+    return np.array(values), results
+
+
+def assert_matches_reference(**params):
+    events_data, price_data, reference = make_dataset()
+    result = vb.VectorizedTedSimulator(events_data, price_data, reference, verbose=False, **params).run()
+    values, results = reference_backtest(events_data, price_data, reference, **params)
+
+    assert np.allclose(result.portfolio['value'].to_numpy(), values)
+    frame = result.event_results
+    keys = [f"{permno}_{day.date()}_{ticker}"
+            for day, permno, ticker in zip(frame['event_date'], frame['permno'], frame['ticker'])]
+    assert keys == list(results)  # Same events, in order of first sell
+    for key, row in zip(keys, frame[vb.RESULT_COLUMNS].to_numpy()):
+        expected = [results[key].get(column, 0.0) for column in vb.RESULT_COLUMNS]
+        assert np.allclose(row, expected), key
+    return result
+
+
+def test_vectorized_matches_day_loop():
+    """Vectorized simulator == literal strategy/broker loop (uncapped, and with trade/position caps)"""
+    result = assert_matches_reference()
+    assert result.stats['trades_executed'] > 0
+    assert_matches_reference(max_daily_trades=10, max_total_positions=200)
+
+
+def test_rescheduled_sells_match_day_loop():
+    """Exact-day prices (no lookback) reschedule sells over missing days; row order still matches Cerebro's"""
+    events_data, price_data, reference = make_dataset()
+    trades = vb.VectorizedTedSimulator(events_data, price_data, reference, verbose=False,
+                                       data_lookback_days=0).build_trades()
+    assert (trades.sell_shift > 0).any()
+    assert_matches_reference(data_lookback_days=0)
+    assert_matches_reference(data_lookback_days=0, max_daily_trades=10, max_total_positions=200)
+
+
+def test_parallel_matches_serial():
+    """Building trades in event-date windows on a pool gives the same run as the serial build"""
+    events_data, price_data, reference = make_dataset()
+    serial = vb.VectorizedTedSimulator(events_data, price_data, reference, verbose=False).run()
+    for window_days in (30, None):
+        parallel = vb.VectorizedTedSimulator(events_data, price_data, reference, verbose=False,
+                                             processes=2, window_days=window_days).run()
+        pd.testing.assert_frame_equal(serial.event_results, parallel.event_results)
+        pd.testing.assert_frame_equal(serial.portfolio, parallel.portfolio)
+
+
+if __name__ == "__main__":
+    print("🎯 Vectorized backtest vs literal day loop...")
+    test_vectorized_matches_day_loop()
+    print("✅ Portfolio values and per-event returns match")
+    print("🎯 Rescheduled sells (no price lookback) vs literal day loop...")
+    test_rescheduled_sells_match_day_loop()
+    print("✅ Same sells, same row order")
+    print("🎯 Parallel (2 processes) vs serial trade building...")
+    test_parallel_matches_serial()
+    print("✅ Identical results")
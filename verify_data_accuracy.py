@@ -2,14 +2,17 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 
-def verify_msft_data():
+from result_matrix import FILLED_CSV
+
+VERIFY_COLUMNS = ['date', 'ticker', 'Return B1S30', 'IYW B1S30']
+
+def verify_msft_data(csv_file=FILLED_CSV):
     """Verify MSFT data from CSV against Yahoo Finance"""
     print("🔍 VERIFYING DATA ACCURACY")
     print("=" * 50)
     
-    # Read the batch result
-    csv_file = "batch_result_IMPROVED_0001.csv"
-    df = pd.read_csv(csv_file)
+    # Read the fill run's export
+    df = pd.read_csv(csv_file, usecols=VERIFY_COLUMNS)
     
     # Get the first MSFT row
     msft_row = df[df['ticker'] == 'MSFT'].iloc[0]
@@ -66,13 +69,12 @@ def verify_msft_data():
     except Exception as e:
         print(f"❌ Error downloading Yahoo Finance data: {e}")
 
-def verify_iyw_data():
+def verify_iyw_data(csv_file=FILLED_CSV):
     """Verify IYW data from CSV"""
     print("\n" + "=" * 50)
     print("🔍 VERIFYING IYW DATA")
     
-    csv_file = "batch_result_IMPROVED_0001.csv"
-    df = pd.read_csv(csv_file)
+    df = pd.read_csv(csv_file, usecols=VERIFY_COLUMNS)
     
     # Get the first MSFT row for IYW data
     msft_row = df[df['ticker'] == 'MSFT'].iloc[0]
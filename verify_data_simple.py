@@ -2,14 +2,16 @@ import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 
-def verify_data_simple():
+from result_matrix import FILLED_CSV
+
+def verify_data_simple(csv_file=FILLED_CSV):
     """Simple verification of the data"""
     print("🔍 DATA VERIFICATION - SIMPLE CHECK")
     print("=" * 60)
     
-    # Read the CSV
-    csv_file = "batch_result_IMPROVED_0001.csv"
-    df = pd.read_csv(csv_file)
+    # Read the fill run's export (only the columns checked below)
+    returns_columns = ['Return B1S30', 'IYW B1S30', 'B1S60', 'B7S30']
+    df = pd.read_csv(csv_file, usecols=lambda col: col in ['date', 'ticker'] + returns_columns)
     
     # Show MSFT data from CSV
     msft_rows = df[df['ticker'] == 'MSFT']
@@ -38,7 +40,6 @@ def verify_data_simple():
     print("   • Direct API calls to Yahoo Finance servers")
     
     # Check the range of values
-    returns_columns = ['Return B1S30', 'IYW B1S30', 'B1S60', 'B7S30']
     available_columns = [col for col in returns_columns if col in df.columns]
     
     print(f"\n📈 DATA RANGE ANALYSIS ({len(available_columns)} columns checked):")